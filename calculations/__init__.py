@@ -0,0 +1,53 @@
+"""Calculations of the trading metrics.
+
+The submodules depend on pandas, so they are imported the first time one of their functions is used (e.g. calculations.calculate_net_pnl_total) instead of when the package is imported.
+Every name listed in the '__all__' of a submodule is available from the package. Submodules without '__all__' (e.g. reference_calculations) are not exported.
+"""
+import ast
+import importlib
+import pkgutil
+
+_function_modules = None
+
+
+def _get_function_modules():
+    """Maps each exported name to its submodule, reading the '__all__' of the submodules without importing them.
+
+    :return function_modules: dictionary. Key: name, value: submodule name.
+    """
+    global _function_modules
+    if _function_modules is not None:
+        return _function_modules
+
+    function_modules = {}
+    for module_info in pkgutil.iter_modules(__path__):
+        spec = module_info.module_finder.find_spec(f'{__name__}.{module_info.name}')
+        with open(spec.origin, encoding='utf-8') as source:
+            tree = ast.parse(source.read())
+
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == '__all__' for target in node.targets):
+                for name in ast.literal_eval(node.value):
+                    if name in function_modules:
+                        raise ImportError(f"'{name}' is exported by both {__name__}.{function_modules[name]} and {__name__}.{module_info.name}.")
+                    function_modules[name] = module_info.name
+
+    _function_modules = function_modules
+    return _function_modules
+
+
+def __getattr__(name: str):
+    """Imports the submodule that defines 'name' the first time it is requested.
+    """
+    function_modules = _get_function_modules()
+    if name not in function_modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f'{__name__}.{function_modules[name]}')
+    value = getattr(module, name)
+    globals()[name] = value  # Next accesses don't go through __getattr__.
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_get_function_modules()))
@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+__all__ = ['get_execution_arrays', 'PandasBackend', 'PolarsBackend', 'get_backend', 'set_backend']
+
+BACKEND_ENV_VAR = 'TRADING_REPORT_BACKEND'
+COMMISSION_COLUMNS = ['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']
+MONEY_COLUMNS = ['gross_pnl', 'commissions', 'ecn_fees']
+
+
+def get_execution_arrays(df: DataFrame):
+    """Gets the columns of the executions needed by the calculations as NumPy arrays.
+
+    :param df: DataFrame with the executions.
+    :return arrays: dictionary with the 'signed_qty' (buys add, sells and shorts subtract), the 'gross_pnl' (buys subtract, sells and shorts add), the 'commissions' and the 'ecn_fees' of each row.
+    """
+    is_buy = (df['B/S'] == 'B').to_numpy()
+    qty = df['Qty'].to_numpy()
+    price = df['Price'].to_numpy()
+
+    return {
+        'signed_qty': np.where(is_buy, qty, -qty),
+        'gross_pnl': np.where(is_buy, -qty * price, qty * price),
+        'commissions': df[COMMISSION_COLUMNS].sum(axis=1).to_numpy(),
+        'ecn_fees': df['Ecn Fee'].to_numpy(),
+    }
+
+
+def _build_index(keys: list, codes: list, uniques: list):
+    """Builds the index of the aggregated rows from the codes of each group and the unique values of each key.
+    """
+    if len(keys) == 1:
+        return pd.Index(uniques[0][codes[0]], name=keys[0])
+    return pd.MultiIndex.from_arrays([values[key_codes] for values, key_codes in zip(uniques, codes)], names=keys)
+
+
+class PandasBackend:
+    """Runs the aggregations with pandas groupby.
+    """
+    name = 'pandas'
+
+    def aggregate(self, df: DataFrame, by: list = ()):
+        """Sums the gross PnL, commissions and ECN fees of the executions, and calculates the net PnL, grouped by the 'by' columns.
+
+        :param df: DataFrame with the executions.
+        :param by: Columns to group by (e.g. ['Date'], ['Symbol'] or ['Date', 'Symbol']). Without columns, the totals are calculated.
+        :return aggregates: DataFrame indexed by the 'by' columns, in order of first appearance, with the columns 'gross_pnl', 'commissions', 'ecn_fees' and 'net_pnl'. A Series if there are no 'by' columns.
+        """
+        arrays = get_execution_arrays(df)
+        frame = DataFrame({column: arrays[column] for column in MONEY_COLUMNS})
+
+        if not by:
+            totals = frame.sum()
+            totals['net_pnl'] = totals['gross_pnl'] - totals['commissions'] - totals['ecn_fees']
+            return totals
+
+        factorized = [pd.factorize(df[key].to_numpy()) for key in by]
+        result = frame.groupby([codes for codes, _ in factorized], sort=True).sum()
+        result['net_pnl'] = result['gross_pnl'] - result['commissions'] - result['ecn_fees']
+
+        group_codes = [result.index.get_level_values(level).to_numpy() for level in range(len(by))]
+        result.index = _build_index(list(by), group_codes, [uniques for _, uniques in factorized])
+        return result
+
+    def closed_trades(self, symbol_codes, signed_qty, money):
+        """Finds the executions that close a trade (the share count of the symbol goes back to 0) and the PnL of each trade.
+
+        :param symbol_codes: Integer code of the symbol of each execution.
+        :param signed_qty: Signed quantity of each execution.
+        :param money: Money of each execution, with commissions and ECN fees applied.
+        :return close_rows, pnl: positions of the closing executions and PnL of the trade each one closes.
+        """
+        share_count = pd.Series(signed_qty).groupby(symbol_codes).cumsum().to_numpy()
+        closes = share_count == 0
+
+        # Number the trades of each symbol by the closes that happened before each execution.
+        closes_before = pd.Series(closes.astype(np.int64)).groupby(symbol_codes).cumsum().to_numpy() - closes
+        trade_codes, _ = pd.factorize(closes_before * (int(symbol_codes.max(initial=0)) + 1) + symbol_codes)
+        trade_pnl = np.bincount(trade_codes, weights=money)
+
+        close_rows = np.flatnonzero(closes)
+        return close_rows, trade_pnl[trade_codes[close_rows]]
+
+
+class PolarsBackend:
+    """Runs the aggregations as Polars lazy queries, which are optimized and executed in parallel on all the cores.
+
+    The results are returned as pandas objects, the same as PandasBackend.
+    """
+    name = 'polars'
+
+    def __init__(self):
+        try:
+            import polars
+        except ImportError as error:
+            raise ImportError("The 'polars' backend requires the polars package (pip install polars).") from error
+        self._pl = polars
+
+    def aggregate(self, df: DataFrame, by: list = ()):
+        """Sums the gross PnL, commissions and ECN fees of the executions, and calculates the net PnL, grouped by the 'by' columns.
+
+        See PandasBackend.aggregate.
+        """
+        pl = self._pl
+        arrays = get_execution_arrays(df)
+        columns = {column: arrays[column] for column in MONEY_COLUMNS}
+
+        # Group by integer codes, so the keys keep their Python types (e.g. dates) in the result.
+        factorized = [pd.factorize(df[key].to_numpy()) for key in by]
+        key_columns = [f'key_{position}' for position in range(len(by))]
+        for key_column, (codes, _) in zip(key_columns, factorized):
+            columns[key_column] = codes
+
+        sums = [pl.col(column).sum() for column in MONEY_COLUMNS]
+        net_pnl = (pl.col('gross_pnl') - pl.col('commissions') - pl.col('ecn_fees')).alias('net_pnl')
+        query = pl.DataFrame(columns).lazy()
+
+        if not by:
+            totals = query.select(sums).with_columns(net_pnl).collect()
+            return pd.Series(totals.row(0, named=True), dtype=np.float64)
+
+        result = query.group_by(key_columns).agg(sums).with_columns(net_pnl).sort(key_columns).collect()
+
+        aggregates = DataFrame({column: result[column].to_numpy() for column in MONEY_COLUMNS + ['net_pnl']})
+        group_codes = [result[key_column].to_numpy() for key_column in key_columns]
+        aggregates.index = _build_index(list(by), group_codes, [uniques for _, uniques in factorized])
+        return aggregates
+
+    def closed_trades(self, symbol_codes, signed_qty, money):
+        """Finds the executions that close a trade and the PnL of each trade.
+
+        See PandasBackend.closed_trades.
+        """
+        pl = self._pl
+        closes = pl.col('share_count') == 0
+
+        result = (
+            pl.DataFrame({'symbol': symbol_codes, 'signed_qty': signed_qty, 'money': money})
+            .lazy()
+            .with_row_index('row')
+            .with_columns(pl.col('signed_qty').cum_sum().over('symbol').alias('share_count'))
+            .with_columns((closes.cast(pl.Int64).cum_sum().over('symbol') - closes.cast(pl.Int64)).alias('trade'))
+            .with_columns(pl.col('money').sum().over(['symbol', 'trade']).alias('pnl'))
+            .filter(closes)
+            .select(['row', 'pnl'])
+            .collect()
+        )
+        return result['row'].to_numpy().astype(np.int64), result['pnl'].to_numpy()
+
+
+BACKENDS = {'pandas': PandasBackend, 'polars': PolarsBackend}
+
+_selected_backend = None
+_backend_instances = {}
+
+
+def set_backend(name: str):
+    """Selects the backend used by the calculations: 'pandas' or 'polars'.
+
+    Without calling it, the backend is read from the TRADING_REPORT_BACKEND environment variable, and defaults to 'pandas'.
+    """
+    global _selected_backend
+    get_backend(name)  # Fail now if the backend is not available.
+    _selected_backend = name
+
+
+def get_backend(name: str = None):
+    """Gets the backend with the given name, or the selected one (see set_backend).
+
+    :return backend: PandasBackend or PolarsBackend instance.
+    """
+    name = name or _selected_backend or os.environ.get(BACKEND_ENV_VAR, 'pandas')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Use one of {list(BACKENDS)}.")
+
+    if name not in _backend_instances:
+        _backend_instances[name] = BACKENDS[name]()
+    return _backend_instances[name]
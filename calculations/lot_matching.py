@@ -0,0 +1,112 @@
+from collections import deque
+import pandas as pd
+from pandas import DataFrame
+from calculations.trade_records import TradeRecords
+
+__all__ = ['MATCHING_METHODS', 'match_lots']
+
+MATCHING_METHODS = ('fifo', 'lifo', 'average')
+
+
+def match_lots(df: DataFrame, method: str = 'fifo'):
+    """Reconstructs the trades matching each exit against the open lots of the symbol, so PnL is realized on every partial exit.
+
+    Each execution in the direction of the position (or with no position) opens a lot. Each execution against the position closes shares from the lots:
+    - 'fifo': the oldest lots first.
+    - 'lifo': the newest lots first.
+    - 'average': a single lot per symbol with the average price of the position.
+    If the execution closes more shares than the position holds, the rest opens a lot in the opposite direction.
+
+    Commissions and ECN fees are allocated by shares: the entry fees of a lot are charged proportionally to the shares closed from it, and the fees of the exit proportionally to the shares it closes.
+    Every exit execution produces one trade with the PnL of all the shares it closes, so a position scaled in and out is split in several trades.
+    When a position is opened and closed with a single exit, the PnL is the same as the trades of build_trade_records.
+
+    The lots of each symbol are kept in a deque, so each execution costs constant time per lot it touches and the whole reconstruction is linear.
+
+    :param df: DataFrame with the executions.
+    :param method: 'fifo', 'lifo' or 'average'.
+    :return records: TradeRecords with a trade per exit execution.
+    """
+    if method not in MATCHING_METHODS:
+        raise ValueError(f"Unknown matching method '{method}'. Use one of {MATCHING_METHODS}.")
+
+    symbol_codes, symbols = pd.factorize(df['Symbol'].to_numpy())
+    day_codes, days = pd.factorize(df['Date'].to_numpy())
+    fees = (df[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum(axis=1) + df['Ecn Fee']).to_numpy()
+    close_times = df['Date/Time'].to_numpy()
+
+    lots = {}  # Key: symbol code, value: deque of [shares, price, fees] lots.
+    directions = {}  # Key: symbol code, value: 1 if long, -1 if short, 0 if flat.
+    trade_rows = []
+    trade_symbols = []
+    trade_pnl = []
+
+    columns = (symbol_codes, df['B/S'].to_numpy(), df['Qty'].to_numpy(), df['Price'].to_numpy(), fees)
+    for row, (symbol, side, qty, price, fee) in enumerate(zip(*columns)):
+        if symbol not in lots:
+            lots[symbol] = deque()
+            directions[symbol] = 0
+        symbol_lots = lots[symbol]
+        direction = 1 if side == 'B' else -1
+
+        # Executions without shares: the fees go to the open position, or are a loss if flat.
+        if qty == 0:
+            if symbol_lots:
+                symbol_lots[-1][2] += fee
+            else:
+                trade_rows.append(row)
+                trade_symbols.append(symbol)
+                trade_pnl.append(-fee)
+            continue
+
+        # Open or add to the position.
+        if directions[symbol] in (0, direction):
+            directions[symbol] = direction
+            if method == 'average' and symbol_lots:
+                lot = symbol_lots[0]
+                lot[1] = (lot[0] * lot[1] + qty * price) / (lot[0] + qty)
+                lot[0] += qty
+                lot[2] += fee
+            else:
+                symbol_lots.append([qty, price, fee])
+            continue
+
+        # Close shares from the lots.
+        remaining = qty
+        pnl = 0
+        while remaining > 0 and symbol_lots:
+            lot = symbol_lots[-1] if method == 'lifo' else symbol_lots[0]
+            matched = min(remaining, lot[0])
+            entry_fee = lot[2] * matched / lot[0]
+            exit_fee = fee * matched / qty
+
+            pnl += (price - lot[1]) * matched * directions[symbol] - entry_fee - exit_fee
+
+            lot[0] -= matched
+            lot[2] -= entry_fee
+            remaining -= matched
+            if lot[0] == 0:
+                if method == 'lifo':
+                    symbol_lots.pop()
+                else:
+                    symbol_lots.popleft()
+
+        trade_rows.append(row)
+        trade_symbols.append(symbol)
+        trade_pnl.append(pnl)
+
+        # The shares left open a position in the opposite direction.
+        if remaining > 0:
+            directions[symbol] = direction
+            symbol_lots.append([remaining, price, fee * remaining / qty])
+        elif not symbol_lots:
+            directions[symbol] = 0
+
+    return TradeRecords(
+        symbols,
+        days,
+        trade_symbols,
+        day_codes[trade_rows],
+        close_times[trade_rows],
+        trade_pnl,
+    )
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from scipy import sparse
+from calculations.backends import get_backend
+
+__all__ = [
+    'PnLMatrix',
+    'build_pnl_matrix',
+    'get_top_contributors_by_day',
+    'calculate_concentration_by_day',
+    'calculate_symbol_concentration',
+    'calculate_symbol_correlation',
+    'calculate_repeat_ticker_performance',
+]
+
+
+class PnLMatrix:
+    """Net PnL of each symbol on each day, as a sparse matrix (days x symbols).
+
+    Only the (day, symbol) pairs with executions are stored, so it stays small with thousands of symbols and years of days.
+
+    :ivar days: array with the days, in chronological order (rows).
+    :ivar symbols: array with the symbols, in order of appearance (columns).
+    :ivar matrix: scipy.sparse CSR matrix with the net PnL.
+    """
+
+    def __init__(self, days, symbols, matrix):
+        self.days = days
+        self.symbols = symbols
+        self.matrix = matrix
+
+    def to_frame(self):
+        """Gets the matrix as a dense DataFrame (index: days, columns: symbols), with 0 where the symbol wasn't traded.
+        """
+        return DataFrame(self.matrix.toarray(), index=pd.Index(self.days, name='Date'), columns=pd.Index(self.symbols, name='Symbol'))
+
+
+def build_pnl_matrix(df: DataFrame):
+    """Builds the day x symbol net PnL matrix from the aggregates by day and symbol.
+
+    :param df: DataFrame with the executions.
+    :return matrix: PnLMatrix.
+    """
+    net_pnl = get_backend().aggregate(df, ['Date', 'Symbol'])['net_pnl']
+
+    day_codes, days = pd.factorize(net_pnl.index.get_level_values('Date').to_numpy(), sort=True)
+    symbol_codes, symbols = pd.factorize(net_pnl.index.get_level_values('Symbol').to_numpy())
+
+    matrix = sparse.csr_matrix((net_pnl.to_numpy(), (day_codes, symbol_codes)), shape=(len(days), len(symbols)))
+    matrix.sort_indices()
+    return PnLMatrix(days, symbols, matrix)
+
+
+def get_top_contributors_by_day(pnl_matrix: PnLMatrix, n: int = 3):
+    """Gets, for each day, the symbols that contributed the most to the result of the day.
+
+    On losing days these are the symbols with the largest losses, on winning days the ones with the largest profits.
+
+    :param pnl_matrix: PnLMatrix.
+    :param n: Number of symbols per day.
+    :return contributors: dictionary. Key: day, value: list of (symbol, net PnL) tuples.
+    """
+    matrix = pnl_matrix.matrix
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    day_sign = np.where(np.asarray(matrix.sum(axis=1)).ravel() < 0, -1, 1)
+
+    # Sort the symbols of each day by their contribution in the direction of the day.
+    order = np.lexsort((-matrix.data * day_sign[rows], rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+    selected = order[rank < n]
+
+    contributors = {day: [] for day in pnl_matrix.days}
+    for row, column, pnl in zip(rows[selected], matrix.indices[selected], matrix.data[selected].tolist()):
+        contributors[pnl_matrix.days[row]].append((pnl_matrix.symbols[column], pnl))
+
+    return contributors
+
+
+def calculate_concentration_by_day(pnl_matrix: PnLMatrix):
+    """Calculates the Herfindahl index of the absolute net PnL of the symbols of each day.
+
+    It goes from 1 / symbols traded (PnL spread evenly) to 1 (the whole PnL of the day comes from one symbol). Days with no PnL get 0.
+
+    :return concentration: dictionary. Key: day, value: Herfindahl index.
+    """
+    absolute = abs(pnl_matrix.matrix)
+    total = np.asarray(absolute.sum(axis=1)).ravel()
+    squares = np.asarray(absolute.multiply(absolute).sum(axis=1)).ravel()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        concentration = np.where(total > 0, squares / total ** 2, 0)
+
+    return dict(zip(pnl_matrix.days, concentration.tolist()))
+
+
+def calculate_symbol_concentration(pnl_matrix: PnLMatrix):
+    """Calculates the Herfindahl index of the absolute total net PnL of the symbols, for the whole period.
+
+    :return concentration: Herfindahl index (0 if there is no PnL).
+    """
+    totals = np.abs(np.asarray(pnl_matrix.matrix.sum(axis=0)).ravel())
+    total = totals.sum()
+    return float((totals ** 2).sum() / total ** 2) if total > 0 else 0
+
+
+def calculate_symbol_correlation(pnl_matrix: PnLMatrix, min_days: int = 2):
+    """Calculates the correlation between the daily net PnL of each pair of symbols.
+
+    Days a symbol wasn't traded count as 0 PnL. Only symbols traded at least 'min_days' days are included, which also limits the size of the result (symbols x symbols).
+    The covariance is calculated from the sparse matrix (X^T X), without building the dense day x symbol matrix.
+
+    :param pnl_matrix: PnLMatrix.
+    :param min_days: Minimum number of days traded to include a symbol.
+    :return correlation: DataFrame (symbols x symbols) with the Pearson correlation. NaN for symbols with constant daily PnL.
+    """
+    matrix = pnl_matrix.matrix.tocsc()
+    selected = np.flatnonzero(np.diff(matrix.indptr) >= min_days)
+    matrix = matrix[:, selected]
+    days = matrix.shape[0]
+    symbols = pd.Index(pnl_matrix.symbols[selected], name='Symbol')
+
+    if days < 2 or len(selected) == 0:
+        return DataFrame(index=symbols, columns=symbols, dtype=np.float64)
+
+    sums = np.asarray(matrix.sum(axis=0)).ravel()
+    covariance = ((matrix.T @ matrix).toarray() - np.outer(sums, sums) / days) / (days - 1)
+    deviation = np.sqrt(np.diag(covariance))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.outer(deviation, deviation)
+
+    return DataFrame(correlation, index=symbols, columns=symbols)
+
+
+def calculate_repeat_ticker_performance(pnl_matrix: PnLMatrix, min_days: int = 2):
+    """Calculates the performance of the symbols traded on several days: in total, on the first day and on the days they were traded again.
+
+    :param pnl_matrix: PnLMatrix.
+    :param min_days: Minimum number of days traded to include a symbol.
+    :return performance: DataFrame indexed by 'Symbol' with the columns 'days_traded', 'net_pnl', 'avg_pnl_per_day', 'winning_days_percentage', 'first_day_pnl', 'repeat_days_pnl' and 'avg_repeat_day_pnl'.
+    """
+    matrix = pnl_matrix.matrix.tocsc()
+    matrix.sort_indices()  # Days of each symbol in chronological order.
+
+    days_traded = np.diff(matrix.indptr)
+    columns = np.repeat(np.arange(matrix.shape[1]), days_traded)
+    net_pnl = np.bincount(columns, weights=matrix.data, minlength=matrix.shape[1])
+    winning_days = np.bincount(columns, weights=matrix.data > 0, minlength=matrix.shape[1])
+
+    first_day_pnl = np.zeros(matrix.shape[1])
+    traded = days_traded > 0
+    first_day_pnl[traded] = matrix.data[matrix.indptr[:-1][traded]]
+    repeat_days_pnl = net_pnl - first_day_pnl
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        performance = DataFrame({
+            'days_traded': days_traded,
+            'net_pnl': net_pnl,
+            'avg_pnl_per_day': np.where(traded, net_pnl / days_traded, 0),
+            'winning_days_percentage': np.where(traded, winning_days / days_traded * 100, 0),
+            'first_day_pnl': first_day_pnl,
+            'repeat_days_pnl': repeat_days_pnl,
+            'avg_repeat_day_pnl': np.where(days_traded > 1, repeat_days_pnl / (days_traded - 1), 0),
+        }, index=pd.Index(pnl_matrix.symbols, name='Symbol'))
+
+    return performance[performance['days_traded'] >= min_days]
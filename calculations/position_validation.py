@@ -0,0 +1,97 @@
+import numpy as np
+from pandas import DataFrame
+
+__all__ = ['get_signed_quantities', 'calculate_positions_by_day_and_symbol', 'validate_positions']
+
+
+def get_signed_quantities(df: DataFrame):
+    """Gets the quantity of each execution signed by its direction.
+
+    Buys ('B') add shares to the position, sells ('S') and shorts ('T') remove them, the same rule applied by the trade reconstruction.
+
+    :param df: DataFrame with the executions.
+    :return signed_qty: Series with the signed quantity of each row.
+    """
+    return df['Qty'].where(df['B/S'] == 'B', -df['Qty'])
+
+
+def calculate_positions_by_day_and_symbol(df: DataFrame):
+    """Calculates, for each (day, symbol), the shares bought, sold and shorted, the net shares and the position held at the end of the day.
+
+    The end of day position is the running position of the symbol, so positions carried from previous days are taken into account.
+
+    :param df: DataFrame with the executions.
+    :return positions: DataFrame indexed by (Date, Symbol) with the columns 'Buy', 'Sell', 'Short', 'Net' and 'Position'.
+    """
+    side = df['B/S']
+    frame = DataFrame({
+        'Date': df['Date'],
+        'Symbol': df['Symbol'],
+        'Buy': df['Qty'].where(side == 'B', 0),
+        'Sell': df['Qty'].where(side == 'S', 0),
+        'Short': df['Qty'].where(side == 'T', 0),
+        'Net': get_signed_quantities(df),
+    })
+
+    positions = frame.groupby(['Date', 'Symbol'], sort=True)[['Buy', 'Sell', 'Short', 'Net']].sum()
+    positions['Position'] = positions.groupby(level='Symbol')['Net'].cumsum()
+    return positions
+
+
+def validate_positions(df: DataFrame):
+    """Validates the executions, reporting every share imbalance and every position carried overnight at once.
+
+    Instead of stopping at the first day whose buys don't match sells and shorts, all the problems are collected in a single dictionary:
+
+    - 'day_imbalances': days whose 'Buy' doesn't match 'Sell' + 'Short'. Key: day, value: {'Buy', 'Sell', 'Short'}.
+    - 'day_symbol_imbalances': net shares left by each (day, symbol) that didn't go flat. Key: (day, symbol), value: net shares.
+    - 'overnight_positions': positions held at the end of each day. Key: day, value: {symbol: position}.
+    - 'open_positions': positions still open after the last execution. Key: symbol, value: position.
+    - 'position_flips': executions that reverse a position without going flat, so the trade never closes. List of (Date/Time, symbol, position before, position after).
+    - 'is_flat': True when every symbol goes flat by the end of each day and no position is reversed without closing.
+
+    Carried positions are not an error: the trade reconstruction keeps the share count of each symbol across days and closes the trade on the day the position goes flat.
+
+    :param df: DataFrame with the executions.
+    :return validation: dictionary with the results of the validation.
+    """
+    positions = calculate_positions_by_day_and_symbol(df)
+
+    # Shares by day.
+    shares_by_day = positions.groupby(level='Date')[['Buy', 'Sell', 'Short']].sum()
+    unbalanced_days = shares_by_day[shares_by_day['Buy'] != shares_by_day['Sell'] + shares_by_day['Short']]
+    day_imbalances = unbalanced_days.to_dict(orient='index')
+
+    # Net shares by day and symbol.
+    day_symbol_imbalances = positions.loc[positions['Net'] != 0, 'Net'].to_dict()
+
+    # Positions held at the end of each day.
+    overnight = positions.loc[positions['Position'] != 0, 'Position']
+    overnight_positions = {}
+    for (day, symbol), position in overnight.items():
+        overnight_positions.setdefault(day, {})[symbol] = position
+
+    # Positions held after the last execution of each symbol.
+    last_positions = positions['Position'].groupby(level='Symbol').last()
+    open_positions = last_positions[last_positions != 0].to_dict()
+
+    # Executions that cross from long to short (or the opposite) without going through zero.
+    signed_qty = get_signed_quantities(df)
+    running_position = signed_qty.groupby(df['Symbol']).cumsum()
+    previous_position = running_position - signed_qty
+    flips = (np.sign(previous_position) * np.sign(running_position)) < 0
+    position_flips = list(zip(
+        df.loc[flips, 'Date/Time'],
+        df.loc[flips, 'Symbol'],
+        previous_position[flips],
+        running_position[flips],
+    ))
+
+    return {
+        'is_flat': not (day_symbol_imbalances or position_flips),
+        'day_imbalances': day_imbalances,
+        'day_symbol_imbalances': day_symbol_imbalances,
+        'overnight_positions': overnight_positions,
+        'open_positions': open_positions,
+        'position_flips': position_flips,
+    }
@@ -0,0 +1,232 @@
+import math
+import random
+from pandas import DataFrame
+from calculations.row_calculations import iter_closed_trades
+from calculations.trade_records import build_trade_records
+
+__all__ = [
+    'KLLSketch',
+    'create_pnl_sketches',
+    'update_pnl_sketches',
+    'merge_pnl_sketches',
+    'summarize_pnl_sketch',
+    'summarize_pnl_sketches',
+]
+
+
+class KLLSketch:
+    """Streaming quantile sketch (KLL) with bounded memory.
+
+    Values are stored in a hierarchy of compactors. When the sketch is full, the fullest compactor is sorted and half of its values (the odd or the even ones, chosen at random) are promoted to the next level with double weight.
+    The memory used depends only on 'k' (around 3 * k values), not on the number of values added, and two sketches can be merged into one.
+    Quantiles are exact while fewer than 'k' values have been added.
+    """
+
+    def __init__(self, k: int = 200, seed: int = None):
+        """
+        :param k: Accuracy parameter. The rank error is around 1.7 / k.
+        :param seed: Seed for the random promotions, for reproducible results.
+        """
+        self.k = k
+        self.compactors = [[]]
+        self.size = 0
+        self.count = 0
+        self.total = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._rng = random.Random(seed)
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level: int):
+        """Calculates the number of values the compactor of a level can hold before being compacted.
+        """
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _grow(self):
+        """Adds a level to the hierarchy of compactors.
+        """
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        """Compacts the levels that are full until the sketch is under its maximum size.
+        """
+        for level in range(len(self.compactors)):
+            if len(self.compactors[level]) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self._grow()
+
+                values = sorted(self.compactors[level])
+                kept = [values.pop()] if len(values) % 2 else []
+                offset = 1 if self._rng.random() < 0.5 else 0
+
+                self.compactors[level + 1].extend(values[offset::2])
+                self.compactors[level] = kept
+                self.size = sum(len(compactor) for compactor in self.compactors)
+
+                if self.size < self._max_size:
+                    break
+
+    def update(self, value: float):
+        """Adds a value to the sketch.
+        """
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        if self.size >= self._max_size:
+            self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """Adds the values summarized by another sketch to this one.
+
+        :param other: Sketch to merge. It is not modified.
+        :return self: The merged sketch.
+        """
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+
+        for level, values in enumerate(other.compactors):
+            self.compactors[level].extend(values)
+
+        self.size = sum(len(compactor) for compactor in self.compactors)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        while self.size >= self._max_size:
+            self._compress()
+
+        return self
+
+    def quantiles(self, fractions: list):
+        """Estimates several quantiles at once.
+
+        The nearest-rank definition is used: the quantile q is the smallest value whose rank is at least q * count.
+
+        :param fractions: List of quantiles between 0 and 1.
+        :return values: list with the estimated value of each quantile (None if the sketch is empty).
+        """
+        if self.count == 0:
+            return [None for _ in fractions]
+
+        weighted_values = sorted((value, 2 ** level) for level, values in enumerate(self.compactors) for value in values)
+        total_weight = sum(weight for _, weight in weighted_values)
+
+        results = []
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+                continue
+            if fraction >= 1:
+                results.append(self.max)
+                continue
+
+            target = fraction * total_weight
+            cumulative_weight = 0
+            for value, weight in weighted_values:
+                cumulative_weight += weight
+                if cumulative_weight >= target:
+                    results.append(value)
+                    break
+
+        return results
+
+    def quantile(self, fraction: float):
+        """Estimates a quantile, e.g. 0.5 for the median.
+        """
+        return self.quantiles([fraction])[0]
+
+
+def create_pnl_sketches():
+    """Creates the empty collection of sketches used to summarize the trade PnL distributions.
+
+    :return sketches: dictionary with a 'total' sketch and the 'by_symbol' and 'by_day' dictionaries of sketches.
+    """
+    return {'total': KLLSketch(), 'by_symbol': {}, 'by_day': {}}
+
+
+def update_pnl_sketches(df: DataFrame, sketches: dict = None, open_trades: dict = None, matching: str = None):
+    """Adds the PnL of the trades closed by the executions to the sketches: in total, by symbol and by day.
+
+    The trades are streamed one by one, so the memory used depends on the number of symbols and days, not on the number of trades.
+    Large histories can be processed in chunks passing the same 'sketches' and 'open_trades' to each chunk.
+
+    :param df: DataFrame with the executions.
+    :param sketches: Sketches to update, as returned by create_pnl_sketches. A new collection is created if not given.
+    :param open_trades: State of the trades still open, see iter_closed_trades.
+    :param matching: How trades are reconstructed, see build_trade_records. The open lots are not kept between chunks, so with a matching method each chunk must start with the positions flat.
+    :return sketches: the updated sketches.
+    """
+    if matching is not None and open_trades is not None:
+        raise ValueError("'open_trades' can only be used when trades are closed when the position is flat (matching=None).")
+
+    if sketches is None:
+        sketches = create_pnl_sketches()
+
+    if matching is None:
+        trades = iter_closed_trades(df, open_trades)
+    else:
+        records = build_trade_records(df, matching)
+        trades = zip(records.day_array(), records.close_times, records.symbol_array(), records.pnl.tolist())
+
+    for date, _, symbol, pnl in trades:
+        if symbol not in sketches['by_symbol']:
+            sketches['by_symbol'][symbol] = KLLSketch()
+        if date not in sketches['by_day']:
+            sketches['by_day'][date] = KLLSketch()
+
+        sketches['total'].update(pnl)
+        sketches['by_symbol'][symbol].update(pnl)
+        sketches['by_day'][date].update(pnl)
+
+    return sketches
+
+
+def merge_pnl_sketches(sketches: dict, other: dict):
+    """Merges the sketches computed for another account or partition of the executions into 'sketches'.
+
+    Partitions must not split a trade: each one has to start and end with the positions flat (e.g. different accounts).
+
+    :return sketches: the merged sketches.
+    """
+    sketches['total'].merge(other['total'])
+
+    for group in ['by_symbol', 'by_day']:
+        for key, sketch in other[group].items():
+            if key not in sketches[group]:
+                sketches[group][key] = KLLSketch()
+            sketches[group][key].merge(sketch)
+
+    return sketches
+
+
+def summarize_pnl_sketch(sketch: KLLSketch):
+    """Gets the count, mean, median, p5/p95 and the tails (min/max) of a PnL sketch.
+    """
+    p5, median, p95 = sketch.quantiles([0.05, 0.5, 0.95])
+
+    return {
+        'count': sketch.count,
+        'mean': sketch.total / sketch.count if sketch.count else 0,
+        'min': sketch.min if sketch.count else None,
+        'p5': p5,
+        'median': median,
+        'p95': p95,
+        'max': sketch.max if sketch.count else None,
+    }
+
+
+def summarize_pnl_sketches(sketches: dict):
+    """Summarizes every sketch of the collection, keeping its structure: 'total', 'by_symbol' and 'by_day'.
+    """
+    return {
+        'total': summarize_pnl_sketch(sketches['total']),
+        'by_symbol': {symbol: summarize_pnl_sketch(sketch) for symbol, sketch in sketches['by_symbol'].items()},
+        'by_day': {day: summarize_pnl_sketch(sketch) for day, sketch in sketches['by_day'].items()},
+    }
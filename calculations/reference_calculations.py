@@ -0,0 +1,794 @@
+"""Reference implementations of the calculations, as they were written with iterrows loops and per-day/per-symbol filtering.
+
+They are kept unchanged as the oracle of the equivalence harness (trading_report/equivalence.py): every optimized path must produce the same results,
+including their edge cases (shorts 'T', trades with PnL 0 counted as losers, only the first trade kept when several close at the same 'Date/Time' in get_trades_by_date,
+and the ValueError raised when the shares of a day don't match). Don't optimize them.
+"""
+from pandas import DataFrame, Series
+
+
+def calculate_commissions_per_row(row: Series):
+    """Calculates the commissions and fees of a trade.
+
+    All commission-related values are summed up in 'commissions', while ecn_fees are handled separately because they can either add or subtract.
+
+    :param row: Row from which commissions are extracted.
+    :return commissions, ecn_fee: float, float representing the commissions and ecn fees earned or lost.
+    """
+    # Sum the commissions from the relevant columns
+    commissions = sum(row[col] for col in ['Comm', 'SEC', 'TAF', 'NSCC', 'CAT'])
+
+    # Get the value of 'Ecn Fee'
+    ecn_fee = row['Ecn Fee']
+
+    return commissions, ecn_fee
+
+
+def get_trades_by_symbol_and_date(df: DataFrame):
+    """Generates a dictionary by symbol, and for each trading day, gets the PnL at the end of the day (with commissions applied).
+    """
+    current_trade_value = {}
+    accumulated_money_per_day = {}
+    share_count = {}
+    winning_trades = 0
+    losing_trades = 0
+    trades_pnl_per_day = {}
+
+    for _, row in df.iterrows():
+        symbol = row['Symbol']
+        date = row['Date']
+
+        # Initialize the dictionaries for the symbol and date if they don't exist
+        if symbol not in current_trade_value:
+            current_trade_value[symbol] = 0
+            accumulated_money_per_day[symbol] = 0
+            share_count[symbol] = 0
+        if symbol not in trades_pnl_per_day:
+            trades_pnl_per_day[symbol] = {}
+        if date not in trades_pnl_per_day[symbol]:
+            trades_pnl_per_day[symbol][date] = 0
+
+        # Update the share count and current_trade_value based on the trade
+        if row['B/S'] == 'B':
+            share_count[symbol] += row['Qty']
+            current_trade_value[symbol] -= row['Qty'] * row['Price']
+        else:
+            share_count[symbol] -= row['Qty']
+            current_trade_value[symbol] += row['Qty'] * row['Price']
+
+        # Calculate commissions and subtract them
+        commissions, ecn_fees = calculate_commissions_per_row(row)
+        current_trade_value[symbol] -= (ecn_fees + commissions)
+
+        # Update the accumulated daily value
+        accumulated_money_per_day[symbol] += current_trade_value[symbol]
+
+        # If the position is closed, evaluate the result of the trade
+        if share_count[symbol] == 0:
+            if current_trade_value[symbol] > 0:
+                trades_pnl_per_day[symbol][date] += current_trade_value[symbol]
+                winning_trades += 1
+            else:
+                trades_pnl_per_day[symbol][date] += current_trade_value[symbol]
+                losing_trades += 1
+
+            # Reset current_trade_value but keep the accumulated daily value
+            current_trade_value[symbol] = 0
+
+    return trades_pnl_per_day
+
+
+def get_trades_by_symbol_date_and_time(df: DataFrame):
+    """Generates a dictionary by symbol, and for each trading day and time, gets the PnL of each trade (with commissions applied).
+    """
+    current_trade_value = {}
+    accumulated_money_per_day = {}
+    share_count = {}
+    winning_trades = 0
+    losing_trades = 0
+    trades_pnl_per_datetime = {}
+
+    for _, row in df.iterrows():
+        symbol = row['Symbol']
+        date_time = row['Date/Time']  # We use 'Date/Time' instead of 'Date'
+
+        # Initialize the dictionaries for the symbol if they don't exist
+        if symbol not in current_trade_value:
+            current_trade_value[symbol] = 0
+            accumulated_money_per_day[symbol] = 0
+            share_count[symbol] = 0
+        if symbol not in trades_pnl_per_datetime:
+            trades_pnl_per_datetime[symbol] = {}
+
+        # Update the share count and current_trade_value based on the trade
+        if row['B/S'] == 'B':
+            share_count[symbol] += row['Qty']
+            current_trade_value[symbol] -= row['Qty'] * row['Price']
+        else:
+            share_count[symbol] -= row['Qty']
+            current_trade_value[symbol] += row['Qty'] * row['Price']
+
+        # Calculate commissions and subtract them
+        commissions, ecn_fees = calculate_commissions_per_row(row)
+        current_trade_value[symbol] -= (ecn_fees + commissions)
+
+        # Update the accumulated daily value
+        accumulated_money_per_day[symbol] += current_trade_value[symbol]
+
+        # If the position is closed, evaluate the result of the trade and log the PnL
+        if share_count[symbol] == 0:
+            if current_trade_value[symbol] > 0:
+                trades_pnl_per_datetime[symbol][date_time] = current_trade_value[symbol]
+                winning_trades += 1
+            else:
+                trades_pnl_per_datetime[symbol][date_time] = current_trade_value[symbol]
+                losing_trades += 1
+
+            # Reset current_trade_value but keep the accumulated daily value
+            current_trade_value[symbol] = 0
+
+    return trades_pnl_per_datetime
+
+def get_trades_by_date(df: DataFrame):
+    """Generates a dictionary sorted by datetime, where the key is the datetime and the value is a tuple (symbol, pnl).
+    """
+    current_trade_value = {}
+    accumulated_money_per_day = {}
+    share_count = {}
+    winning_trades = 0
+    losing_trades = 0
+    trades_pnl_per_datetime = {}
+
+    for _, row in df.iterrows():
+        symbol = row['Symbol']
+        date_time = row['Date/Time']  # We use 'Date/Time' instead of 'Date'
+
+        # Initialize the dictionaries for the symbol if they don't exist
+        if symbol not in current_trade_value:
+            current_trade_value[symbol] = 0
+            accumulated_money_per_day[symbol] = 0
+            share_count[symbol] = 0
+
+        # Update the share count and current_trade_value based on the trade
+        if row['B/S'] == 'B':
+            share_count[symbol] += row['Qty']
+            current_trade_value[symbol] -= row['Qty'] * row['Price']
+        else:
+            share_count[symbol] -= row['Qty']
+            current_trade_value[symbol] += row['Qty'] * row['Price']
+
+        # Calculate commissions and subtract them
+        commissions, ecn_fees = calculate_commissions_per_row(row)
+        current_trade_value[symbol] -= (ecn_fees + commissions)
+
+        # Update the accumulated daily value
+        accumulated_money_per_day[symbol] += current_trade_value[symbol]
+
+        # If the position is closed, evaluate the result of the trade and log the PnL
+        if share_count[symbol] == 0:
+            if date_time not in trades_pnl_per_datetime:
+                trades_pnl_per_datetime[date_time] = (symbol, current_trade_value[symbol])
+
+            if current_trade_value[symbol] > 0:
+                winning_trades += 1
+            else:
+                losing_trades += 1
+
+            # Reset current_trade_value but keep the accumulated daily value
+            current_trade_value[symbol] = 0
+
+    return trades_pnl_per_datetime
+
+
+def get_individual_trades_per_day(df: DataFrame):
+    """Generates a dictionary where each key is a date, and its value is a list of trades made on that day.
+
+    Each trade includes the symbol and the individual trade PnL.
+    """
+    accumulated_money = {}
+    share_count = {}
+    trades_per_day = {}
+
+    for _, row in df.iterrows():
+        symbol = row['Symbol']
+        date = row['Date']
+
+        # Ensure the dictionary by date is initialized
+        if date not in trades_per_day:
+            trades_per_day[date] = []
+        if symbol not in accumulated_money:
+            accumulated_money[symbol] = 0
+            share_count[symbol] = 0
+
+        # Update share count and accumulated money
+        if row['B/S'] == 'B':  # Buy
+            share_count[symbol] += row['Qty']
+            accumulated_money[symbol] -= row['Qty'] * row['Price']
+        else:  # Sell
+            share_count[symbol] -= row['Qty']
+            accumulated_money[symbol] += row['Qty'] * row['Price']
+
+        # Subtract commissions and ECN fees
+        commissions, ecn_fees = calculate_commissions_per_row(row)
+        accumulated_money[symbol] -= (commissions + ecn_fees)
+
+        # If the share count reaches 0, close the trade and store it
+        if share_count[symbol] == 0:
+            trade_pnl = accumulated_money[symbol]
+            trade_info = {'Symbol': symbol, 'PnL': trade_pnl}
+
+            # Store the trade in the list for the corresponding date
+            trades_per_day[date].append(trade_info)
+
+            # Reset the accumulated money for the symbol
+            accumulated_money[symbol] = 0
+
+    return trades_per_day
+
+
+def calculate_gross_pnl_total(df: DataFrame):
+    """Calculates the total PNL before commissions and ECN fees.
+    """
+    accumulated_purchase_money = 0
+    accumulated_sale_money = 0
+    for _, row in df.iterrows():
+      if row['B/S'] == 'S' or row['B/S'] == 'T':
+        accumulated_sale_money += row['Qty'] * row['Price']
+      else:
+        accumulated_purchase_money -= row['Qty'] * row['Price']
+
+    return accumulated_purchase_money + accumulated_sale_money
+
+
+def calculate_net_pnl_total(df: DataFrame):
+  """Calculates the total PNL after applying commissions and ECN fees.
+  """
+  accumulated_purchase_money = 0
+  accumulated_sale_money = 0
+  accumulated_commissions = 0
+  accumulated_ecn = 0
+  for _, row in df.iterrows():
+    commissions, ecn_fees = calculate_commissions_per_row(row)
+    accumulated_commissions += commissions
+    accumulated_ecn += ecn_fees
+    if row['B/S'] == 'S' or row['B/S'] == 'T':
+      accumulated_sale_money += row['Qty'] * row['Price']
+    else:
+      accumulated_purchase_money -= row['Qty'] * row['Price']
+
+  return (accumulated_purchase_money + accumulated_sale_money) - (accumulated_ecn + accumulated_commissions)
+
+
+def calculate_total_commissions(df: DataFrame):
+  """Calculates the total commissions.
+  """
+  accumulated_commissions = 0
+  for _, row in df.iterrows():
+    commissions, ecn_fees = calculate_commissions_per_row(row)
+    accumulated_commissions += commissions
+  return accumulated_commissions
+
+
+def calculate_total_ecn_fees(df: DataFrame):
+  """Calculates the total ECN fees. If negative, it means money gained.
+  """
+  accumulated_ecn = 0
+  for _, row in df.iterrows():
+    commissions, ecn_fees = calculate_commissions_per_row(row)
+    accumulated_ecn += ecn_fees
+  return accumulated_ecn
+
+
+def calculate_total_shares(df: DataFrame):
+    """Calculates the total number of shares bought, sold, and shorted based on the 'B/S' column (Buy, Sell, Short).
+    """
+    # Initialize the dictionary.
+    total_shares = {'Buy': 0, 'Sell': 0, 'Short': 0}
+
+    # Iterate over the rows of the DataFrame.
+    for _, row in df.iterrows():
+        # Add to the corresponding key based on the 'B/S' value.
+        if row['B/S'] == 'B':
+            total_shares['Buy'] += row['Qty']
+        elif row['B/S'] == 'S':
+            total_shares['Sell'] += row['Qty']
+        elif row['B/S'] == 'T':
+            total_shares['Short'] += row['Qty']
+
+    # Check that the number of shares matches.
+    if total_shares['Buy'] != total_shares['Sell'] + total_shares['Short']:
+      raise ValueError(f"The total 'Buy' ({total_shares['Buy']}) does not match the sum of 'Sell' ({total_shares['Sell']}) and 'Short' ({total_shares['Short']}).")
+
+    return total_shares
+
+
+def calculate_winning_trades(df: DataFrame):
+  """Calculates the quantity of winning result trades.
+  """
+  accumulated_money = {}
+  share_count = {}
+  winning_trades = 0
+  losing_trades = 0
+
+  for _, row in df.iterrows():
+    symbol = row['Symbol']
+    if symbol not in accumulated_money:
+      accumulated_money[symbol] = 0
+      share_count[symbol] = 0
+
+    if row['B/S'] == 'B':
+     share_count[symbol] += row['Qty']
+     accumulated_money[symbol] -= row['Qty'] * row['Price']
+    else:
+      share_count[symbol] -= row['Qty']
+      accumulated_money[symbol] += row['Qty'] * row['Price']
+
+    commissions, ecn_fees = calculate_commissions_per_row(row)
+    accumulated_money[symbol] -= ecn_fees + commissions
+
+    if share_count[symbol] == 0:
+      if accumulated_money[symbol] > 0:
+        winning_trades += 1
+      else:
+        losing_trades += 1
+
+      # Reset values for the symbol
+      accumulated_money[symbol] = 0
+
+  return winning_trades
+
+
+def calculate_losing_trades(df: DataFrame):
+  """Calculates the quantity of losing result trades.
+  """
+  accumulated_money = {}
+  share_count = {}
+  winning_trades = 0
+  losing_trades = 0
+
+  for _, row in df.iterrows():
+    symbol = row['Symbol']
+    if symbol not in accumulated_money:
+      accumulated_money[symbol] = 0
+      share_count[symbol] = 0
+
+    if row['B/S'] == 'B':
+      share_count[symbol] += row['Qty']
+      accumulated_money[symbol] -= row['Qty'] * row['Price']
+    else:
+      share_count[symbol] -= row['Qty']
+      accumulated_money[symbol] += row['Qty'] * row['Price']
+
+    commissions, ecn_fees = calculate_commissions_per_row(row)
+    accumulated_money[symbol] -= ecn_fees + commissions
+
+    if share_count[symbol] == 0:
+      if accumulated_money[symbol] > 0:
+        winning_trades += 1
+      else:
+        losing_trades += 1
+
+      # Reset values for the symbol
+      accumulated_money[symbol] = 0
+
+  return losing_trades
+
+
+def calculate_avg_winning_and_losing_trades(df: DataFrame):
+  """Calculates the average of winning and losing trades.
+  """
+  trades_dict = get_individual_trades_per_day(df)
+  winning_trades = []
+  losing_trades = []
+
+  for date, trades in trades_dict.items():
+      for trade in trades:
+          pnl = trade['PnL']
+          if pnl > 0:
+              winning_trades.append(pnl)
+          elif pnl < 0:
+              losing_trades.append(pnl)
+
+  avg_winners = sum(winning_trades) / len(winning_trades) if winning_trades else 0
+  avg_losers = sum(losing_trades) / len(losing_trades) if losing_trades else 0
+
+  return {
+      'avg_winning_trades': avg_winners,
+      'avg_losing_trades': avg_losers
+  }
+
+
+def calculate_filtered_avg_winning_and_losing_trades(df: DataFrame):
+  """Calculates the average of winning and losing trades removing trades between -1 and 1 pnl.
+  """
+  trades_dict = get_individual_trades_per_day(df)
+  winning_trades = []
+  losing_trades = []
+
+  for date, trades in trades_dict.items():
+      for trade in trades:
+          pnl = trade['PnL']
+          if pnl > 1:
+              winning_trades.append(pnl)
+          elif pnl < -1:
+              losing_trades.append(pnl)
+
+  avg_winners = sum(winning_trades) / len(winning_trades) if winning_trades else 0
+  avg_losers = sum(losing_trades) / len(losing_trades) if losing_trades else 0
+
+  return {
+      'avg_winning_trades': avg_winners,
+      'avg_losing_trades': avg_losers
+  }
+
+
+def calculate_accuracy_percentage(df: DataFrame):
+  """Calculates the percentage of successfull trades.
+  """
+  winning_trades = calculate_winning_trades(df)
+  losing_trades = calculate_losing_trades(df)
+  total_trades = winning_trades + losing_trades
+
+  accuracy_percentage = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+  return accuracy_percentage
+
+
+def calculate_profit_factor(df: DataFrame):
+  """Calculates the profit factor.
+  """
+  trades_dict = get_individual_trades_per_day(df)
+  winning_trades = []
+  losing_trades = []
+
+  for date, trades in trades_dict.items():
+      for trade in trades:
+          pnl = trade['PnL']
+          if pnl > 0:
+              winning_trades.append(pnl)
+          elif pnl < 0:
+              losing_trades.append(pnl)
+
+  sum_winning_trades = sum(winning_trades) if winning_trades else 0
+  sum_losing_trades = sum(losing_trades) if losing_trades else 0
+
+  if sum_losing_trades == 0:
+    return float('inf')  # Avoid division by zero
+
+  return sum_winning_trades / abs(sum_losing_trades)
+
+
+def calculate_filtered_profit_factor(df: DataFrame):
+  """Calculates the profit factor removing trades between -1 and 1.
+  """
+  trades_dict = get_individual_trades_per_day(df)
+  winning_trades = []
+  losing_trades = []
+
+  for date, trades in trades_dict.items():
+      for trade in trades:
+          pnl = trade['PnL']
+          if pnl > 0 and pnl > 1:
+              winning_trades.append(pnl)
+          elif pnl < 0 and pnl < -1:
+              losing_trades.append(pnl)
+
+  sum_winning_trades = sum(winning_trades) if winning_trades else 0
+  sum_losing_trades = sum(losing_trades) if losing_trades else 0
+
+  if sum_losing_trades == 0:
+    return float('inf')  # Avoid division by zero
+
+  return sum_winning_trades / abs(sum_losing_trades)
+
+
+def calculate_gross_pnl_by_day(df: DataFrame):
+    """Calculates the gross PnL by day.
+    """
+    df_by_day = {day: group for day, group in df.groupby('Date')}  # Convert the dataframe to a dictionary. Key: day, value: rows
+
+    gross_pnl_by_day = {}
+
+    for day, rows in df_by_day.items():
+        # Create an entry in the dictionary for each day.
+        gross_pnl_by_day[day] = 0
+
+        # Get the unique symbols for the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame filtered by Symbol.
+
+            # Calculate the gross PnL, excluding commissions.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) * symbol_row['B/S'].apply(lambda x: -1 if x in ['B'] else 1)).sum()
+
+            gross_pnl_by_day[day] += calculation
+
+    return gross_pnl_by_day
+
+
+def calculate_cumulative_gross_pnl_by_day(df: DataFrame):
+    """Calculates the cumulative gross PnL by day from a DataFrame.
+    """
+    # Convert the DataFrame into a dictionary: key = day, value = rows for that day.
+    df_by_day = {day: group for day, group in df.groupby('Date')}
+
+    # Dictionary to store the cumulative PnL.
+    cumulative_pnl_by_day = {}
+    cumulative_pnl = 0  # Initialize the PnL accumulator.
+
+    for day, rows in sorted(df_by_day.items()):  # Sort days chronologically.
+        # Get the list of unique symbols traded on the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        daily_pnl = 0  # Gross PnL for the day.
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # Filter by symbol.
+
+            # Calculate the gross PnL for the symbol.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) *
+                           symbol_row['B/S'].apply(lambda x: -1 if x == 'B' else 1)).sum()
+
+            daily_pnl += calculation
+
+        cumulative_pnl += daily_pnl  # Update the accumulator.
+        cumulative_pnl_by_day[day] = cumulative_pnl  # Save the accumulated PnL up to the current day.
+
+    return cumulative_pnl_by_day
+
+
+def calculate_net_pnl_by_day(df: DataFrame):
+    """Calculates the net PnL by day.
+    """
+    df_by_day = {day: group for day, group in df.groupby('Date')}  # Convert the dataframe to a dictionary. Key: day, value: rows
+
+    net_pnl_by_day = {}
+
+    for day, rows in df_by_day.items():
+        # Create an entry in the dictionary for each day.
+        net_pnl_by_day[day] = 0
+
+        # Get the unique symbols for the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame filtered by Symbol.
+
+            # Calculate the gross PnL, excluding commissions.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) * symbol_row['B/S'].apply(lambda x: -1 if x in ['B'] else 1)).sum()
+
+            # Calculate commissions and ECN fees by summing per row
+            commissions = symbol_row[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum().sum()
+            ecn_fees = symbol_row['Ecn Fee'].sum()
+
+            # Adjust the PnL calculation with commissions and ECN fees
+            calculation = calculation - commissions + ecn_fees * -1
+
+            net_pnl_by_day[day] += calculation
+
+    return net_pnl_by_day
+
+
+def calculate_cumulative_net_pnl_by_day(df: DataFrame):
+    """Calculates the cumulative net PnL by day from a DataFrame.
+    """
+    # Convert the DataFrame into a dictionary: key = day, value = rows for that day.
+    df_by_day = {day: group for day, group in df.groupby('Date')}
+
+    # Dictionary to store the cumulative PnL.
+    cumulative_net_pnl_by_day = {}
+    cumulative_pnl = 0  # Initialize the PnL accumulator.
+
+    for day, rows in sorted(df_by_day.items()):  # Sort days chronologically.
+        # Get the list of unique symbols traded on the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        daily_net_pnl = 0  # Net PnL for the day.
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # Filter by symbol.
+
+            # Calculate the gross PnL for the symbol.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) *
+                           symbol_row['B/S'].apply(lambda x: -1 if x == 'B' else 1)).sum()
+
+            # Calculate commissions and ECN fees.
+            commissions = symbol_row[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum().sum()
+            ecn_fees = symbol_row['Ecn Fee'].sum()
+
+            # Adjust the PnL calculation with commissions and ECN fees.
+            calculation = calculation - commissions + ecn_fees * -1
+
+            daily_net_pnl += calculation
+
+        cumulative_pnl += daily_net_pnl  # Update the accumulator.
+        cumulative_net_pnl_by_day[day] = cumulative_pnl  # Save the accumulated net PnL up to the current day.
+
+    return cumulative_net_pnl_by_day
+
+
+def calculate_shares_by_day(df: DataFrame):
+    """Calculates the shares traded by day.
+    """
+    df_by_day = {day: group for day, group in df.groupby('Date')}  # Convert the dataframe to a dictionary. Key: day, value: rows
+
+    # Initialize the dictionary.
+    shares_by_day = {}
+
+    for day, rows in df_by_day.items():
+        # Create an entry in the dictionary for each day.
+        shares_by_day[day] = {'Buy': 0, 'Sell': 0, 'Short': 0}
+
+        # Iterate over the rows of the DataFrame.
+        for _, row in rows.iterrows():
+            # Add to the corresponding key based on the 'B/S' value.
+            if row['B/S'] == 'B':
+                shares_by_day[day]['Buy'] += row['Qty']
+            elif row['B/S'] == 'S':
+                shares_by_day[day]['Sell'] += row['Qty']
+            elif row['B/S'] == 'T':
+                shares_by_day[day]['Short'] += row['Qty']
+
+        # Ensure that the number of actions match.
+        if shares_by_day[day]['Buy'] != shares_by_day[day]['Sell'] + shares_by_day[day]['Short']:
+            raise ValueError(f"The total 'Buy' ({shares_by_day[day]['Buy']}) does not match the sum of 'Sell' ({shares_by_day[day]['Sell']}) and 'Short' ({shares_by_day[day]['Short']}) for the symbol {row['Symbol']}.")
+
+    return shares_by_day
+
+
+def calculate_commissions_by_day(df: DataFrame):
+    """Calculates the commissions charged by day.
+    """
+    df_by_day = {day: group for day, group in df.groupby('Date')}  # Convert the dataframe to a dictionary. Key: day, value: rows
+
+    commissions_by_day = {}
+
+    for day, rows in df_by_day.items():
+        # Create an entry in the dictionary for each day.
+        commissions_by_day[day] = 0
+
+        # Get the unique symbols for the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame filtered by Symbol.
+
+            # Calculate commissions by summing per row.
+            commissions = symbol_row[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum().sum()
+            commissions_by_day[day] += commissions
+
+    return commissions_by_day
+
+
+def calculate_ecn_fees_by_day(df: DataFrame):
+    """Calculates the Ecn Fees earned or lost by day.
+    """
+    df_by_day = {day: group for day, group in df.groupby('Date')}  # Convert the dataframe to a dictionary. Key: day, value: rows
+
+    ecn_fees_by_day = {}
+
+    for day, rows in df_by_day.items():
+        # Create an entry in the dictionary for each day.
+        ecn_fees_by_day[day] = 0
+
+        # Get the unique symbols for the day.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame filtered by Symbol.
+
+            # Calculate ECN fees by summing per row.
+            ecn_fees = symbol_row['Ecn Fee'].sum()
+
+            ecn_fees_by_day[day] += ecn_fees
+
+    return ecn_fees_by_day
+
+
+def get_won_lost_trades_by_day(df: DataFrame):
+    """Obtains the number of won and lost trades by day.
+    """
+    trade_history = get_trades_by_date(df)
+    result = {}
+
+    for date, (asset, trade_result) in trade_history.items():
+        # Extract the date (year, month, day)
+        day = date.date()
+
+        # If the date is not in the dictionary, initialize it with an empty dictionary
+        if day not in result:
+            result[day] = {'winners': 0, 'losers': 0}
+
+        # Count winners and losers
+        if trade_result > 0:
+            result[day]['winners'] += 1
+        else:
+            result[day]['losers'] += 1
+
+    return result
+
+
+def calculate_gross_pnl_by_symbol(df: DataFrame):
+    """Calculates the gross PnL by symbol, adjusting the sign based on the 'B/S' column.
+    """
+    # Get the entire list of unique symbols.
+    symbol_list = df['Symbol'].drop_duplicates().tolist()
+
+    # Initialize the dictionary with values set to 0.
+    gross_pnl_by_symbol = {symbol: 0 for symbol in symbol_list}
+
+    # Convert the DataFrame into a dictionary. Key: day, Value: DataFrame rows.
+    df_by_day = {day: group for day, group in df.groupby('Date')}
+
+    for day, rows in df_by_day.items():
+        # Get the unique symbols for the day being processed.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame with rows filtered by Symbol.
+
+            # Calculate the gross PnL, ignoring commissions.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) * symbol_row['B/S'].apply(lambda x: -1 if x in ['B'] else 1)).sum()
+
+            # Add the result to the dictionary
+            gross_pnl_by_symbol[symbol] += calculation
+
+    return gross_pnl_by_symbol
+
+
+def calculate_net_pnl_by_symbol(df: DataFrame):
+    """Calculates the net PnL by symbol.
+    """
+    # Get the entire list of unique symbols.
+    symbol_list = df['Symbol'].drop_duplicates().tolist()
+
+    # Initialize the dictionary with values set to 0.
+    net_pnl_by_symbol = {symbol: 0 for symbol in symbol_list}
+
+    # Convert the DataFrame into a dictionary. Key: day, Value: DataFrame rows.
+    df_by_day = {day: group for day, group in df.groupby('Date')}
+
+    for day, rows in df_by_day.items():
+        # Get the unique symbols for the day being processed.
+        symbols_for_day = rows['Symbol'].drop_duplicates().tolist()
+
+        for symbol in symbols_for_day:
+            symbol_row = rows[rows['Symbol'] == symbol]  # DataFrame with rows filtered by Symbol.
+
+            # Calculate the gross PnL, ignoring commissions.
+            calculation = ((symbol_row['Price'] * symbol_row['Qty']) * symbol_row['B/S'].apply(lambda x: -1 if x in ['B'] else 1)).sum()
+
+            # Calculate commissions and ECN fees by summing the commissions per row
+            commissions = symbol_row[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum().sum()
+            ecn_fees = symbol_row['Ecn Fee'].sum()
+
+            # Adjust the PnL calculation with the commissions and ECN fees
+            calculation = calculation - commissions + ecn_fees * -1
+
+            # Add the result to the dictionary
+            net_pnl_by_symbol[symbol] += calculation
+
+    return net_pnl_by_symbol
+
+
+def get_won_lost_trades_by_symbol(df: DataFrame):
+    """Generates a dictionary with the number of won and lost trades by symbol.
+    """
+    trade_history = get_trades_by_symbol_and_date(df)
+
+    symbol_trade_result = {}
+    for symbol, dates_pnls in trade_history.items():
+        for date, pnl in dates_pnls.items():
+
+            # Initialize the counter for the symbol if it doesn't exist
+            if symbol not in symbol_trade_result:
+                symbol_trade_result[symbol] = {'won': 0, 'lost': 0}
+
+            # Increment the counter for won or lost trades based on the PnL
+            #TODO: Filter trades between -1 and 1.
+            if pnl > 0:
+                symbol_trade_result[symbol]['won'] += 1
+            else:
+                symbol_trade_result[symbol]['lost'] += 1
+
+    return symbol_trade_result
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from calculations.per_day_metrics import calculate_net_pnl_by_day
+from calculations.trade_records import build_trade_records
+
+__all__ = ['calculate_rolling_trade_metrics', 'calculate_rolling_daily_metrics']
+
+
+def _rolling_sum(values, window: int):
+    """Sums the last 'window' values at each position using prefix sums, in a single pass.
+
+    The first positions sum the values available so far.
+    """
+    prefix = np.concatenate(([0], np.cumsum(values, dtype=np.float64)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return prefix[ends] - prefix[starts]
+
+
+def _calculate_window_metrics(pnl_sum, win_sum, loss_sum, win_count, loss_count, trade_count):
+    """Calculates the performance metrics of each window from its sums and counts.
+
+    The definitions match calculate_profit_factor, calculate_accuracy_percentage and calculate_avg_winning_and_losing_trades:
+    trades with PnL 0 are losers for the accuracy but are left out of the averages, and the profit factor is infinite when there are no losses.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(loss_sum == 0, np.inf, win_sum / np.abs(loss_sum))
+        accuracy_percentage = np.where(trade_count > 0, win_count / trade_count * 100, 0)
+        avg_winning_trades = np.where(win_count > 0, win_sum / win_count, 0)
+        avg_losing_trades = np.where(loss_count > 0, loss_sum / loss_count, 0)
+
+    return {
+        'trades': trade_count.astype(np.int64),
+        'net_pnl': pnl_sum,
+        'profit_factor': profit_factor,
+        'accuracy_percentage': accuracy_percentage,
+        'avg_winning_trades': avg_winning_trades,
+        'avg_losing_trades': avg_losing_trades,
+    }
+
+
+def calculate_rolling_trade_metrics(df: DataFrame, window: int = 100, matching: str = None):
+    """Calculates the profit factor, accuracy, average winner/loser and net PnL of the last 'window' trades, after each closed trade.
+
+    All the windows are calculated at once with prefix sums, so the cost is linear in the number of trades whatever the window. The first rows use the trades available so far.
+
+    :param df: DataFrame with the executions.
+    :param window: Number of trades of each window.
+    :param matching: How trades are reconstructed, see build_trade_records.
+    :return metrics: DataFrame with a row per closed trade (in closing order) with the columns 'Date/Time', 'Symbol', 'trades', 'net_pnl', 'profit_factor', 'accuracy_percentage', 'avg_winning_trades' and 'avg_losing_trades'.
+    """
+    records = build_trade_records(df, matching)
+    pnl = records.pnl
+    is_winner = pnl > 0
+    is_loser = pnl < 0
+
+    metrics = _calculate_window_metrics(
+        _rolling_sum(pnl, window),
+        _rolling_sum(np.where(is_winner, pnl, 0), window),
+        _rolling_sum(np.where(is_loser, pnl, 0), window),
+        _rolling_sum(is_winner, window),
+        _rolling_sum(is_loser, window),
+        _rolling_sum(np.ones(len(pnl)), window),
+    )
+
+    return DataFrame({'Date/Time': records.close_times, 'Symbol': records.symbol_array(), **metrics})
+
+
+def calculate_rolling_daily_metrics(df: DataFrame, window: int = 20, matching: str = None):
+    """Calculates the profit factor, accuracy, average winner/loser and net PnL of the last 'window' trading days, for each day.
+
+    The trade metrics use the trades closed in the window, aggregated by day first. The net PnL is the sum of the daily net PnL (calculate_net_pnl_by_day), so it includes positions still open.
+    All the windows are calculated at once with prefix sums over the daily aggregates. The first rows use the days available so far.
+
+    :param df: DataFrame with the executions.
+    :param window: Number of trading days of each window.
+    :param matching: How trades are reconstructed, see build_trade_records.
+    :return metrics: DataFrame indexed by 'Date' (chronological) with the columns 'trades', 'net_pnl', 'profit_factor', 'accuracy_percentage', 'avg_winning_trades' and 'avg_losing_trades'.
+    """
+    net_pnl_by_day = calculate_net_pnl_by_day(df)
+    days = pd.Index(sorted(net_pnl_by_day.keys()), name='Date')
+
+    # Aggregate the trades by closing day.
+    records = build_trade_records(df, matching)
+    pnl = records.pnl
+    is_winner = pnl > 0
+    is_loser = pnl < 0
+    positions = days.get_indexer(records.day_array())
+
+    def sum_by_day(values):
+        return np.bincount(positions, weights=values, minlength=len(days))
+
+    metrics = _calculate_window_metrics(
+        _rolling_sum([net_pnl_by_day[day] for day in days], window),
+        _rolling_sum(sum_by_day(np.where(is_winner, pnl, 0)), window),
+        _rolling_sum(sum_by_day(np.where(is_loser, pnl, 0)), window),
+        _rolling_sum(sum_by_day(is_winner), window),
+        _rolling_sum(sum_by_day(is_loser), window),
+        _rolling_sum(sum_by_day(np.ones(len(pnl))), window),
+    )
+
+    return DataFrame(metrics, index=days)
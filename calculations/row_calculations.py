@@ -1,4 +1,15 @@
+import pandas as pd
 from pandas import DataFrame, Series
+from calculations.trade_records import build_trade_records
+
+__all__ = [
+    'calculate_commissions_per_row',
+    'get_trades_by_symbol_and_date',
+    'get_trades_by_symbol_date_and_time',
+    'get_trades_by_date',
+    'get_individual_trades_per_day',
+    'iter_closed_trades',
+]
 
 def calculate_commissions_per_row(row: Series):
     """Calculates the commissions and fees of a trade.
@@ -17,203 +28,99 @@ def calculate_commissions_per_row(row: Series):
     return commissions, ecn_fee
 
 
-def get_trades_by_symbol_and_date(df: DataFrame):
+def get_trades_by_symbol_and_date(df: DataFrame, matching: str = None):
     """Generates a dictionary by symbol, and for each trading day, gets the PnL at the end of the day (with commissions applied).
+
+    Every day the symbol was traded has an entry, with 0 if no trade was closed that day.
+
+    :param matching: How trades are reconstructed, see build_trade_records.
     """
-    current_trade_value = {}
-    accumulated_money_per_day = {}
-    share_count = {}
-    winning_trades = 0
-    losing_trades = 0
-    trades_pnl_per_day = {}
+    records = build_trade_records(df, matching)
 
-    for _, row in df.iterrows():
-        symbol = row['Symbol']
-        date = row['Date']
+    # Sum the PnL of the trades closed by each symbol and day.
+    closed_pnl = pd.Series(records.pnl).groupby([records.symbol_array(), records.day_array()], sort=False).sum().to_dict()
 
-        # Initialize the dictionaries for the symbol and date if they don't exist
-        if symbol not in current_trade_value:
-            current_trade_value[symbol] = 0
-            accumulated_money_per_day[symbol] = 0
-            share_count[symbol] = 0
+    trades_pnl_per_day = {}
+    for symbol, date in df[['Symbol', 'Date']].drop_duplicates().itertuples(index=False):
         if symbol not in trades_pnl_per_day:
             trades_pnl_per_day[symbol] = {}
-        if date not in trades_pnl_per_day[symbol]:
-            trades_pnl_per_day[symbol][date] = 0
-
-        # Update the share count and current_trade_value based on the trade
-        if row['B/S'] == 'B':
-            share_count[symbol] += row['Qty']
-            current_trade_value[symbol] -= row['Qty'] * row['Price']
-        else:
-            share_count[symbol] -= row['Qty']
-            current_trade_value[symbol] += row['Qty'] * row['Price']
-
-        # Calculate commissions and subtract them
-        commissions, ecn_fees = calculate_commissions_per_row(row)
-        current_trade_value[symbol] -= (ecn_fees + commissions)
-
-        # Update the accumulated daily value
-        accumulated_money_per_day[symbol] += current_trade_value[symbol]
-
-        # If the position is closed, evaluate the result of the trade
-        if share_count[symbol] == 0:
-            if current_trade_value[symbol] > 0:
-                trades_pnl_per_day[symbol][date] += current_trade_value[symbol]
-                winning_trades += 1
-            else:
-                trades_pnl_per_day[symbol][date] += current_trade_value[symbol]
-                losing_trades += 1
-
-            # Reset current_trade_value but keep the accumulated daily value
-            current_trade_value[symbol] = 0
+        trades_pnl_per_day[symbol][date] = closed_pnl.get((symbol, date), 0)
 
     return trades_pnl_per_day
 
 
-def get_trades_by_symbol_date_and_time(df: DataFrame):
+def get_trades_by_symbol_date_and_time(df: DataFrame, matching: str = None):
     """Generates a dictionary by symbol, and for each trading day and time, gets the PnL of each trade (with commissions applied).
-    """
-    current_trade_value = {}
-    accumulated_money_per_day = {}
-    share_count = {}
-    winning_trades = 0
-    losing_trades = 0
-    trades_pnl_per_datetime = {}
-
-    for _, row in df.iterrows():
-        symbol = row['Symbol']
-        date_time = row['Date/Time']  # We use 'Date/Time' instead of 'Date'
-
-        # Initialize the dictionaries for the symbol if they don't exist
-        if symbol not in current_trade_value:
-            current_trade_value[symbol] = 0
-            accumulated_money_per_day[symbol] = 0
-            share_count[symbol] = 0
-        if symbol not in trades_pnl_per_datetime:
-            trades_pnl_per_datetime[symbol] = {}
-
-        # Update the share count and current_trade_value based on the trade
-        if row['B/S'] == 'B':
-            share_count[symbol] += row['Qty']
-            current_trade_value[symbol] -= row['Qty'] * row['Price']
-        else:
-            share_count[symbol] -= row['Qty']
-            current_trade_value[symbol] += row['Qty'] * row['Price']
-
-        # Calculate commissions and subtract them
-        commissions, ecn_fees = calculate_commissions_per_row(row)
-        current_trade_value[symbol] -= (ecn_fees + commissions)
 
-        # Update the accumulated daily value
-        accumulated_money_per_day[symbol] += current_trade_value[symbol]
-
-        # If the position is closed, evaluate the result of the trade and log the PnL
-        if share_count[symbol] == 0:
-            if current_trade_value[symbol] > 0:
-                trades_pnl_per_datetime[symbol][date_time] = current_trade_value[symbol]
-                winning_trades += 1
-            else:
-                trades_pnl_per_datetime[symbol][date_time] = current_trade_value[symbol]
-                losing_trades += 1
+    :param matching: How trades are reconstructed, see build_trade_records.
+    """
+    records = build_trade_records(df, matching)
+    trades_pnl_per_datetime = {symbol: {} for symbol in records.symbols}
 
-            # Reset current_trade_value but keep the accumulated daily value
-            current_trade_value[symbol] = 0
+    for trade in records:
+        trades_pnl_per_datetime[trade.symbol][trade.date_time] = trade.pnl
 
     return trades_pnl_per_datetime
 
-def get_trades_by_date(df: DataFrame):
+def get_trades_by_date(df: DataFrame, matching: str = None):
     """Generates a dictionary sorted by datetime, where the key is the datetime and the value is a tuple (symbol, pnl).
-    """
-    current_trade_value = {}
-    accumulated_money_per_day = {}
-    share_count = {}
-    winning_trades = 0
-    losing_trades = 0
-    trades_pnl_per_datetime = {}
 
-    for _, row in df.iterrows():
-        symbol = row['Symbol']
-        date_time = row['Date/Time']  # We use 'Date/Time' instead of 'Date'
+    If several trades are closed at the same datetime, only the first one is kept.
 
-        # Initialize the dictionaries for the symbol if they don't exist
-        if symbol not in current_trade_value:
-            current_trade_value[symbol] = 0
-            accumulated_money_per_day[symbol] = 0
-            share_count[symbol] = 0
+    :param matching: How trades are reconstructed, see build_trade_records.
+    """
+    records = build_trade_records(df, matching)
+    trades_pnl_per_datetime = {}
 
-        # Update the share count and current_trade_value based on the trade
-        if row['B/S'] == 'B':
-            share_count[symbol] += row['Qty']
-            current_trade_value[symbol] -= row['Qty'] * row['Price']
-        else:
-            share_count[symbol] -= row['Qty']
-            current_trade_value[symbol] += row['Qty'] * row['Price']
+    for trade in records:
+        if trade.date_time not in trades_pnl_per_datetime:
+            trades_pnl_per_datetime[trade.date_time] = (trade.symbol, trade.pnl)
 
-        # Calculate commissions and subtract them
-        commissions, ecn_fees = calculate_commissions_per_row(row)
-        current_trade_value[symbol] -= (ecn_fees + commissions)
+    return trades_pnl_per_datetime
 
-        # Update the accumulated daily value
-        accumulated_money_per_day[symbol] += current_trade_value[symbol]
 
-        # If the position is closed, evaluate the result of the trade and log the PnL
-        if share_count[symbol] == 0:
-            if date_time not in trades_pnl_per_datetime:
-                trades_pnl_per_datetime[date_time] = (symbol, current_trade_value[symbol])
+def get_individual_trades_per_day(df: DataFrame, matching: str = None):
+    """Generates a dictionary where each key is a date, and its value is a list of trades made on that day.
 
-            if current_trade_value[symbol] > 0:
-                winning_trades += 1
-            else:
-                losing_trades += 1
+    Each trade includes the symbol and the individual trade PnL. Use build_trade_records to work with the trades as arrays.
 
-            # Reset current_trade_value but keep the accumulated daily value
-            current_trade_value[symbol] = 0
+    :param matching: How trades are reconstructed, see build_trade_records.
+    """
+    return build_trade_records(df, matching).to_trades_per_day()
 
-    return trades_pnl_per_datetime
 
+def iter_closed_trades(df: DataFrame, open_trades: dict = None):
+    """Yields the trades closed by the executions one by one, without storing them.
 
-def get_individual_trades_per_day(df: DataFrame):
-    """Generates a dictionary where each key is a date, and its value is a list of trades made on that day.
+    A trade is closed when the share count of its symbol goes back to 0, as in get_individual_trades_per_day.
 
-    Each trade includes the symbol and the individual trade PnL.
+    :param df: DataFrame with the executions.
+    :param open_trades: Optional dictionary with the state of the open trades. Key: symbol, value: [share_count, accumulated_money]. It is updated in place, so the same dictionary can be passed to consecutive chunks of executions.
+    :return trades: generator of (date, date_time, symbol, pnl) tuples.
     """
-    accumulated_money = {}
-    share_count = {}
-    trades_per_day = {}
+    if open_trades is None:
+        open_trades = {}
 
-    for _, row in df.iterrows():
-        symbol = row['Symbol']
-        date = row['Date']
+    commissions = df[['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']].sum(axis=1)
+    columns = (df['Date'], df['Date/Time'], df['Symbol'], df['B/S'], df['Qty'], df['Price'], commissions, df['Ecn Fee'])
 
-        # Ensure the dictionary by date is initialized
-        if date not in trades_per_day:
-            trades_per_day[date] = []
-        if symbol not in accumulated_money:
-            accumulated_money[symbol] = 0
-            share_count[symbol] = 0
+    for date, date_time, symbol, side, qty, price, commission, ecn_fee in zip(*columns):
+        if symbol not in open_trades:
+            open_trades[symbol] = [0, 0]
+        trade = open_trades[symbol]
 
         # Update share count and accumulated money
-        if row['B/S'] == 'B':  # Buy
-            share_count[symbol] += row['Qty']
-            accumulated_money[symbol] -= row['Qty'] * row['Price']
-        else:  # Sell
-            share_count[symbol] -= row['Qty']
-            accumulated_money[symbol] += row['Qty'] * row['Price']
+        if side == 'B':
+            trade[0] += qty
+            trade[1] -= qty * price
+        else:
+            trade[0] -= qty
+            trade[1] += qty * price
 
         # Subtract commissions and ECN fees
-        commissions, ecn_fees = calculate_commissions_per_row(row)
-        accumulated_money[symbol] -= (commissions + ecn_fees)
-
-        # If the share count reaches 0, close the trade and store it
-        if share_count[symbol] == 0:
-            trade_pnl = accumulated_money[symbol]
-            trade_info = {'Symbol': symbol, 'PnL': trade_pnl}
-
-            # Store the trade in the list for the corresponding date
-            trades_per_day[date].append(trade_info)
-
-            # Reset the accumulated money for the symbol
-            accumulated_money[symbol] = 0
+        trade[1] -= (commission + ecn_fee)
 
-    return trades_per_day
+        # If the share count reaches 0, close the trade
+        if trade[0] == 0:
+            yield date, date_time, symbol, trade[1]
+            trade[1] = 0
@@ -0,0 +1,136 @@
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from calculations.backends import get_backend, get_execution_arrays
+
+__all__ = ['TradeRecord', 'TradeRecords', 'build_trade_records']
+
+
+class TradeRecord(Mapping):
+    """Lightweight view of a single closed trade.
+
+    It is a read-only mapping with the same keys as the trade dictionaries ('Symbol', 'PnL') plus 'Date' and 'Date/Time', so it can be used where those dictionaries were expected.
+    """
+    __slots__ = ('symbol', 'pnl', 'date', 'date_time')
+
+    _keys = {'Symbol': 'symbol', 'PnL': 'pnl', 'Date': 'date', 'Date/Time': 'date_time'}
+
+    def __init__(self, symbol, pnl, date, date_time):
+        self.symbol = symbol
+        self.pnl = pnl
+        self.date = date
+        self.date_time = date_time
+
+    def __getitem__(self, key):
+        return getattr(self, self._keys[key])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"TradeRecord(symbol={self.symbol!r}, pnl={self.pnl!r}, date={self.date!r}, date_time={self.date_time!r})"
+
+
+class TradeRecords:
+    """Closed trades stored as columns of NumPy arrays (struct of arrays), ordered by closing execution.
+
+    Symbols and days are stored once and referenced by integer codes, so each trade takes 24 bytes (symbol code, day code, closing time and PnL) instead of a dictionary per trade.
+    Reductions (counts, sums, averages) can be done directly on the arrays.
+
+    :ivar symbols: array with the unique symbols, in order of appearance.
+    :ivar days: array with every day with executions, in order of appearance (days without closed trades included).
+    :ivar symbol_codes: int32 array with the index in 'symbols' of each trade.
+    :ivar day_codes: int32 array with the index in 'days' of each trade.
+    :ivar close_times: array with the 'Date/Time' of the execution that closes each trade.
+    :ivar pnl: float64 array with the PnL of each trade (with commissions applied).
+    """
+
+    def __init__(self, symbols, days, symbol_codes, day_codes, close_times, pnl):
+        self.symbols = symbols
+        self.days = days
+        self.symbol_codes = np.asarray(symbol_codes, dtype=np.int32)
+        self.day_codes = np.asarray(day_codes, dtype=np.int32)
+        self.close_times = np.asarray(close_times)
+        self.pnl = np.asarray(pnl, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.pnl)
+
+    def __getitem__(self, position: int):
+        return TradeRecord(
+            self.symbols[self.symbol_codes[position]],
+            float(self.pnl[position]),
+            self.days[self.day_codes[position]],
+            pd.Index(self.close_times[position:position + 1])[0],
+        )
+
+    def __iter__(self):
+        columns = (self.symbol_array(), self.pnl.tolist(), self.day_array(), pd.Index(self.close_times))
+        for symbol, pnl, date, date_time in zip(*columns):
+            yield TradeRecord(symbol, pnl, date, date_time)
+
+    def symbol_array(self):
+        """Gets the symbol of each trade.
+        """
+        return self.symbols[self.symbol_codes]
+
+    def day_array(self):
+        """Gets the closing day of each trade.
+        """
+        return self.days[self.day_codes]
+
+    def pnl_by_day(self):
+        """Sums the PnL of the trades closed each day. Days without closed trades are included with 0.
+        """
+        totals = np.bincount(self.day_codes, weights=self.pnl, minlength=len(self.days))
+        return dict(zip(self.days, totals.tolist()))
+
+    def pnl_by_symbol(self):
+        """Sums the PnL of the trades of each symbol.
+        """
+        totals = np.bincount(self.symbol_codes, weights=self.pnl, minlength=len(self.symbols))
+        return dict(zip(self.symbols, totals.tolist()))
+
+    def to_trades_per_day(self):
+        """Gets the trades in the format of get_individual_trades_per_day: key: date, value: list of {'Symbol', 'PnL'} dictionaries.
+        """
+        trades_per_day = {day: [] for day in self.days}
+        for symbol, pnl, day in zip(self.symbol_array(), self.pnl.tolist(), self.day_array()):
+            trades_per_day[day].append({'Symbol': symbol, 'PnL': pnl})
+        return trades_per_day
+
+
+def build_trade_records(df: DataFrame, matching: str = None):
+    """Reconstructs the closed trades of the executions as TradeRecords, without iterating over the rows.
+
+    A trade is closed when the share count of its symbol goes back to 0. The running share count is a cumulative sum by symbol, the trades are numbered by counting the previous closes of the symbol,
+    and the PnL of each trade is the sum of the money (with commissions and ECN fees) of its executions. These steps run in the selected backend (see get_backend).
+
+    :param df: DataFrame with the executions.
+    :param matching: None to close trades when the position is flat, or 'fifo', 'lifo' or 'average' to realize the PnL of every partial exit (see match_lots).
+    :return records: TradeRecords with the closed trades.
+    """
+    if matching is not None:
+        from calculations.lot_matching import match_lots
+        return match_lots(df, matching)
+
+    symbol_codes, symbols = pd.factorize(df['Symbol'].to_numpy())
+    day_codes, days = pd.factorize(df['Date'].to_numpy())
+    arrays = get_execution_arrays(df)
+
+    # Money of each execution: buys subtract, sells and shorts add. Commissions and ECN fees always subtract.
+    money = arrays['gross_pnl'] - (arrays['commissions'] + arrays['ecn_fees'])
+    close_rows, pnl = get_backend().closed_trades(symbol_codes, arrays['signed_qty'], money)
+
+    return TradeRecords(
+        symbols,
+        days,
+        symbol_codes[close_rows],
+        day_codes[close_rows],
+        df['Date/Time'].to_numpy()[close_rows],
+        pnl,
+    )
@@ -0,0 +1,197 @@
+import io
+import os
+import numpy as np
+from calculations.per_day_metrics import calculate_cumulative_net_pnl_by_day, calculate_net_pnl_by_day
+from calculations.symbol_metrics import calculate_net_pnl_by_symbol
+from calculations.trade_records import build_trade_records
+
+
+def downsample_lttb(x, y, threshold: int):
+    """Downsamples a line with the Largest-Triangle-Three-Buckets algorithm, keeping its visual shape.
+
+    The first and last points are kept. The rest of the points are split into 'threshold' - 2 buckets and, for each bucket, the point forming the largest triangle with the previously selected point and the average of the next bucket is selected.
+
+    :param x: Array with the x values (numeric), sorted.
+    :param y: Array with the y values.
+    :param threshold: Maximum number of points to keep.
+    :return indexes: array with the indexes of the selected points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    indexes = np.empty(threshold, dtype=np.int64)
+    indexes[0] = 0
+    indexes[-1] = n - 1
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the last bucket).
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        if end >= n - 1:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        # Area of the triangles formed by the selected point, each point of the bucket and the next average.
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected]) - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indexes[bucket + 1] = selected
+
+    return indexes
+
+
+def downsample_min_max(y, buckets: int):
+    """Downsamples a series keeping the minimum and maximum of each bucket, so no peak is lost.
+
+    :param y: Array with the values.
+    :param buckets: Number of buckets. At most 2 * 'buckets' points are kept.
+    :return indexes: sorted array with the indexes of the selected points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+
+    if 2 * buckets >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    indexes = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        indexes.append(start + np.argmin(y[start:end]))
+        indexes.append(start + np.argmax(y[start:end]))
+
+    return np.unique(indexes)
+
+
+def plot_equity_curve(df, max_points: int = 1000, matching: str = None):
+    """Plots the cumulative net PnL after each closed trade, with the cumulative net PnL at the end of each day.
+
+    Both lines are downsampled with LTTB to 'max_points' points.
+
+    :param matching: How trades are reconstructed, see build_trade_records.
+    :return figure: matplotlib Figure.
+    """
+    from matplotlib.figure import Figure
+
+    records = build_trade_records(df, matching)
+    trade_times = records.close_times.astype('datetime64[ns]')
+    trade_equity = np.cumsum(records.pnl)
+    trade_indexes = downsample_lttb(trade_times.astype(np.int64), trade_equity, max_points)
+
+    cumulative_by_day = calculate_cumulative_net_pnl_by_day(df)
+    days = np.array(list(cumulative_by_day.keys()), dtype='datetime64[D]')
+    day_equity = np.array(list(cumulative_by_day.values()), dtype=np.float64)
+    day_indexes = downsample_lttb(days.astype(np.int64), day_equity, max_points)
+
+    figure = Figure(figsize=(12, 5))
+    axes = figure.subplots()
+    axes.plot(trade_times[trade_indexes], trade_equity[trade_indexes], linewidth=1, label='Per trade')
+    axes.plot(days[day_indexes], day_equity[day_indexes], marker='.', linestyle='none', label='End of day')
+    axes.axhline(0, color='grey', linewidth=0.5)
+    axes.set_title('Equity curve (net PnL)')
+    axes.legend()
+    figure.autofmt_xdate()
+    return figure
+
+
+def plot_daily_pnl(df, max_bars: int = 250):
+    """Plots the net PnL of each day as bars.
+
+    When there are more than 'max_bars' days, the best and worst day of each bucket of days are kept.
+
+    :return figure: matplotlib Figure.
+    """
+    from matplotlib.figure import Figure
+
+    net_by_day = calculate_net_pnl_by_day(df)
+    days = np.array(list(net_by_day.keys()), dtype='datetime64[D]')
+    pnl = np.array(list(net_by_day.values()), dtype=np.float64)
+    indexes = downsample_min_max(pnl, max_bars // 2)
+
+    figure = Figure(figsize=(12, 5))
+    axes = figure.subplots()
+    axes.bar(days[indexes], pnl[indexes], color=np.where(pnl[indexes] >= 0, 'tab:green', 'tab:red'))
+    axes.axhline(0, color='grey', linewidth=0.5)
+    axes.set_title('Net PnL by day')
+    figure.autofmt_xdate()
+    return figure
+
+
+def plot_pnl_by_symbol(df, top_symbols: int = 15):
+    """Plots the net PnL of the best and worst 'top_symbols' symbols, adding up the rest in 'Others'.
+
+    :return figure: matplotlib Figure.
+    """
+    from matplotlib.figure import Figure
+
+    net_by_symbol = sorted(calculate_net_pnl_by_symbol(df).items(), key=lambda item: item[1])
+
+    if len(net_by_symbol) > 2 * top_symbols:
+        others = sum(pnl for _, pnl in net_by_symbol[top_symbols:-top_symbols])
+        net_by_symbol = net_by_symbol[:top_symbols] + [('Others', others)] + net_by_symbol[-top_symbols:]
+
+    symbols = [symbol for symbol, _ in net_by_symbol]
+    pnl = np.array([pnl for _, pnl in net_by_symbol], dtype=np.float64)
+
+    figure = Figure(figsize=(8, max(4, 0.3 * len(symbols))))
+    axes = figure.subplots()
+    axes.barh(symbols, pnl, color=np.where(pnl >= 0, 'tab:green', 'tab:red'))
+    axes.axvline(0, color='grey', linewidth=0.5)
+    axes.set_title('Net PnL by symbol')
+    figure.tight_layout()
+    return figure
+
+
+def render_charts(df, output_dir: str, formats: tuple = ('png', 'svg', 'html'), max_points: int = 1000, max_bars: int = 250, top_symbols: int = 15, matching: str = None):
+    """Renders the equity curve, the daily PnL and the PnL by symbol charts to files.
+
+    PNG and SVG formats create a file per chart. The HTML format creates a single 'report.html' with the charts embedded as SVG.
+    The number of points drawn is limited by 'max_points' and 'max_bars', so the time and size of the charts don't grow with the history.
+
+    :param df: DataFrame with the executions.
+    :param output_dir: Directory where the files are saved. It is created if it doesn't exist.
+    :param formats: Formats to render: 'png', 'svg' and/or 'html'.
+    :param matching: How the trades of the equity curve are reconstructed, see build_trade_records.
+    :return paths: list with the paths of the created files.
+    """
+    charts = {
+        'equity_curve': plot_equity_curve(df, max_points, matching),
+        'daily_pnl': plot_daily_pnl(df, max_bars),
+        'pnl_by_symbol': plot_pnl_by_symbol(df, top_symbols),
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    for name, figure in charts.items():
+        for file_format in ['png', 'svg']:
+            if file_format in formats:
+                path = os.path.join(output_dir, f'{name}.{file_format}')
+                figure.savefig(path, format=file_format)
+                paths.append(path)
+
+    if 'html' in formats:
+        sections = []
+        for name, figure in charts.items():
+            buffer = io.StringIO()
+            figure.savefig(buffer, format='svg')
+            svg = buffer.getvalue()
+            sections.append(f'<section id="{name}">{svg[svg.index("<svg"):]}</section>')
+
+        path = os.path.join(output_dir, 'report.html')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>Trading report</title></head>\n<body>\n')
+            file.write('\n'.join(sections))
+            file.write('\n</body>\n</html>\n')
+        paths.append(path)
+
+    return paths
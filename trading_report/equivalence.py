@@ -0,0 +1,459 @@
+import argparse
+import importlib
+import inspect
+import math
+import pkgutil
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import calculations
+from calculations import reference_calculations as reference
+from calculations.backends import BACKENDS, get_backend, set_backend
+
+# Amounts are compared as fixed-point numbers with a resolution of a millionth of a dollar (fees have 4 decimals).
+ABSOLUTE_TOLERANCE = 1e-6
+COMMISSION_COLUMNS = ['Comm', 'SEC', 'TAF', 'NSCC', 'CAT']
+
+
+def generate_executions(seed: int, rows: int = 2000, symbols: int = 20, carry_probability: float = 0.05, zero_pnl_probability: float = 0.05, zero_qty_probability: float = 0.01):
+    """Generates a random stream of executions with the format of clean_data.
+
+    The stream is made of trades (long, or short with 'T') that scale in and out with several executions, interleaved between symbols, with these edge cases:
+    - Trades with PnL 0 (same entry and exit price, no fees), which are counted as losers.
+    - Several trades closed at the same 'Date/Time' (times have a resolution of seconds and are often repeated).
+    - Positions carried overnight (the exit happens on a later day, or never).
+    - Executions with 'Qty' 0 that only charge fees.
+
+    :param seed: Seed of the random generator, so every stream can be reproduced.
+    :param rows: Approximate number of executions.
+    :param symbols: Number of different symbols.
+    :return df: DataFrame with the executions, in chronological order and with the index reversed, as returned by clean_data.
+    """
+    rng = random.Random(seed)
+    symbol_names = [f'SYM{number}' for number in range(symbols)]
+    executions = []
+    carried = {}  # Key: symbol, value: (exit side, shares) of a position carried overnight.
+    day = pd.Timestamp('2025-01-02')
+
+    def add_execution(time, symbol, side, qty, price, zero_fees=False):
+        fees = [0.0] * 6 if zero_fees else [round(rng.uniform(0, 0.5), 4) for _ in COMMISSION_COLUMNS] + [round(rng.uniform(-0.3, 0.3), 4)]
+        executions.append([time, symbol, side, qty, price] + fees)
+
+    while len(executions) < rows:
+        open_time = day + pd.Timedelta(hours=9, minutes=30)
+
+        for symbol in rng.sample(symbol_names, rng.randint(1, symbols)):
+            # Each execution is 0 to 20 seconds after the previous one of the symbol, starting in a short window, so different symbols often share the same 'Date/Time'.
+            clock = [open_time + pd.Timedelta(seconds=rng.randint(0, 300))]
+
+            def next_time():
+                clock[0] += pd.Timedelta(seconds=rng.randint(0, 20))
+                return clock[0]
+
+            price = round(rng.uniform(1, 200), 2)
+
+            # Close the position carried from a previous day.
+            if symbol in carried:
+                side, shares = carried.pop(symbol)
+                add_execution(next_time(), symbol, side, shares, round(price * rng.uniform(0.9, 1.1), 2))
+
+            if rng.random() < zero_qty_probability:
+                add_execution(next_time(), symbol, rng.choice(['B', 'S']), 0, price)
+
+            is_short = rng.random() < 0.3
+            entry_side, exit_side = ('T', 'B') if is_short else ('B', 'S')
+            zero_pnl = rng.random() < zero_pnl_probability
+
+            entries = [rng.choice([1, 50, 100, 200, 300, 500]) for _ in range(rng.randint(1, 3))]
+            for qty in entries:
+                add_execution(next_time(), symbol, entry_side, qty, price, zero_pnl)
+
+            # Scale out in several executions.
+            remaining = sum(entries)
+            exits = []
+            while remaining > 0:
+                qty = remaining if rng.random() < 0.5 else rng.randint(1, remaining)
+                exits.append(qty)
+                remaining -= qty
+
+            if not zero_pnl and rng.random() < carry_probability:
+                carried[symbol] = (exit_side, exits.pop())
+
+            for qty in exits:
+                exit_price = price if zero_pnl else round(price * rng.uniform(0.97, 1.03), 2)
+                add_execution(next_time(), symbol, exit_side, qty, exit_price, zero_pnl)
+
+        day += pd.Timedelta(days=1)
+
+    df = DataFrame(executions, columns=['Date/Time', 'Symbol', 'B/S', 'Qty', 'Price'] + COMMISSION_COLUMNS + ['Ecn Fee'])
+    df = df.sort_values('Date/Time', kind='stable').reset_index(drop=True)
+
+    # Same layout as clean_data: the file is read newest first and reversed.
+    df = df.iloc[::-1].reset_index(drop=True).iloc[::-1]
+    df['Date'] = df['Date/Time'].dt.date
+    return df
+
+
+def find_difference(expected, actual, path: str = ''):
+    """Compares two results recursively, with the amounts as fixed-point numbers.
+
+    Dictionaries must have the same keys in the same order, lists and tuples the same length, and numbers must be equal within ABSOLUTE_TOLERANCE (infinite values must be equal).
+
+    :return difference: description of the first difference, or None if the results are equivalent.
+    """
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return f'{path}: expected a dictionary, got {type(actual).__name__}'
+        if list(expected.keys()) != list(actual.keys()):
+            return f'{path}: keys {list(expected.keys())[:10]} != {list(actual.keys())[:10]}'
+        for key in expected:
+            difference = find_difference(expected[key], actual[key], f'{path}[{key!r}]')
+            if difference:
+                return difference
+        return None
+
+    if isinstance(expected, (list, tuple)):
+        if len(expected) != len(actual):
+            return f'{path}: length {len(expected)} != {len(actual)}'
+        for position, (expected_item, actual_item) in enumerate(zip(expected, actual)):
+            difference = find_difference(expected_item, actual_item, f'{path}[{position}]')
+            if difference:
+                return difference
+        return None
+
+    if isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        if math.isinf(expected) or math.isinf(actual):
+            return None if expected == actual else f'{path}: {expected} != {actual}'
+        return None if abs(expected - actual) <= ABSOLUTE_TOLERANCE else f'{path}: {expected!r} != {actual!r}'
+
+    return None if expected == actual else f'{path}: {expected!r} != {actual!r}'
+
+
+def _reference_trades(df: DataFrame):
+    """Gets the trades of the reference implementation as a flat list of (date, symbol, pnl).
+    """
+    return [(date, trade['Symbol'], trade['PnL']) for date, trades in reference.get_individual_trades_per_day(df).items() for trade in trades]
+
+
+def _reference_trade_metrics(df: DataFrame):
+    """Gets the whole-history trade metrics of the reference implementation, in the format of the last row of calculate_rolling_trade_metrics.
+    """
+    pnl = [trade_pnl for _, _, trade_pnl in _reference_trades(df)]
+    averages = reference.calculate_avg_winning_and_losing_trades(df)
+    return {
+        'trades': len(pnl),
+        'net_pnl': sum(pnl),
+        'profit_factor': reference.calculate_profit_factor(df),
+        'accuracy_percentage': reference.calculate_accuracy_percentage(df),
+        'avg_winning_trades': averages['avg_winning_trades'],
+        'avg_losing_trades': averages['avg_losing_trades'],
+    }
+
+
+def _fast_trade_metrics(df: DataFrame):
+    rolling = calculations.calculate_rolling_trade_metrics(df, window=len(df) + 1)
+    if rolling.empty:
+        return {'trades': 0, 'net_pnl': 0, 'profit_factor': float('inf'), 'accuracy_percentage': 0, 'avg_winning_trades': 0, 'avg_losing_trades': 0}
+    return rolling.drop(columns=['Date/Time', 'Symbol']).iloc[-1].to_dict()
+
+
+def _tally_shares(rows: DataFrame):
+    """Counts the shares bought, sold and shorted row by row, as the reference does before its balance check.
+
+    The reference raises when 'Buy' doesn't match 'Sell' + 'Short', which happens in most random streams because of the positions carried overnight, so the counts are compared without the check.
+    """
+    shares = {'Buy': 0, 'Sell': 0, 'Short': 0}
+    for _, row in rows.iterrows():
+        if row['B/S'] == 'B':
+            shares['Buy'] += row['Qty']
+        elif row['B/S'] == 'S':
+            shares['Sell'] += row['Qty']
+        elif row['B/S'] == 'T':
+            shares['Short'] += row['Qty']
+    return shares
+
+
+def _reference_shares_by_day(df: DataFrame):
+    return {day: _tally_shares(rows) for day, rows in df.groupby('Date')}
+
+
+def _sketch_summary(pnl: list):
+    """Gets the count, total, min and max of a list of PnL, as tracked by the sketches.
+    """
+    return {'count': len(pnl), 'total': sum(pnl), 'min': min(pnl, default=math.inf), 'max': max(pnl, default=-math.inf)}
+
+
+def _fast_sketch_summary(df: DataFrame):
+    sketch = calculations.update_pnl_sketches(df)['total']
+    return {'count': sketch.count, 'total': sketch.total, 'min': sketch.min, 'max': sketch.max}
+
+
+def _drop_open_symbols(df: DataFrame):
+    """Removes the executions of the symbols with a position still open at the end.
+
+    Lot matching realizes the PnL of the partial exits of those positions, while the reference only counts trades that go back to flat.
+    """
+    share_count = calculations.get_signed_quantities(df).groupby(df['Symbol']).sum()
+    return df[df['Symbol'].isin(share_count.index[share_count == 0])]
+
+
+def _reference_pnl_by_symbol_of_flat_symbols(df: DataFrame):
+    """Gets the PnL of the trades of each symbol that ends flat.
+    """
+    trades = reference.get_trades_by_symbol_and_date(_drop_open_symbols(df))
+    return {symbol: sum(pnl_by_date.values()) for symbol, pnl_by_date in trades.items()}
+
+
+def _lot_matching_pnl_by_symbol(method: str):
+    def run(df: DataFrame):
+        return calculations.match_lots(_drop_open_symbols(df), method).pnl_by_symbol()
+    return run
+
+
+def _fast_pnl_matrix_by_day(df: DataFrame):
+    pnl_matrix = calculations.build_pnl_matrix(df)
+    return dict(zip(pnl_matrix.days, np.asarray(pnl_matrix.matrix.sum(axis=1)).ravel().tolist()))
+
+
+def _fast_pnl_matrix_by_symbol(df: DataFrame):
+    pnl_matrix = calculations.build_pnl_matrix(df)
+    return dict(zip(pnl_matrix.symbols, np.asarray(pnl_matrix.matrix.sum(axis=0)).ravel().tolist()))
+
+
+def _same_name(name: str):
+    """Gets the reference and the optimized implementation of a function with the same name.
+    """
+    return name, getattr(reference, name), getattr(calculations, name)
+
+
+# Checks: (name, reference implementation, optimized implementation). Both receive the DataFrame with the executions.
+CHECKS = [
+    _same_name('get_trades_by_symbol_and_date'),
+    _same_name('get_trades_by_symbol_date_and_time'),
+    _same_name('get_trades_by_date'),
+    _same_name('get_individual_trades_per_day'),
+    _same_name('calculate_gross_pnl_total'),
+    _same_name('calculate_net_pnl_total'),
+    _same_name('calculate_total_commissions'),
+    _same_name('calculate_total_ecn_fees'),
+    ('calculate_total_shares', _tally_shares, calculations.calculate_total_shares),
+    _same_name('calculate_winning_trades'),
+    _same_name('calculate_losing_trades'),
+    _same_name('calculate_avg_winning_and_losing_trades'),
+    _same_name('calculate_filtered_avg_winning_and_losing_trades'),
+    _same_name('calculate_accuracy_percentage'),
+    _same_name('calculate_profit_factor'),
+    _same_name('calculate_filtered_profit_factor'),
+    _same_name('calculate_gross_pnl_by_day'),
+    _same_name('calculate_cumulative_gross_pnl_by_day'),
+    _same_name('calculate_net_pnl_by_day'),
+    _same_name('calculate_cumulative_net_pnl_by_day'),
+    ('calculate_shares_by_day', _reference_shares_by_day, calculations.calculate_shares_by_day),
+    _same_name('calculate_commissions_by_day'),
+    _same_name('calculate_ecn_fees_by_day'),
+    _same_name('get_won_lost_trades_by_day'),
+    _same_name('calculate_gross_pnl_by_symbol'),
+    _same_name('calculate_net_pnl_by_symbol'),
+    _same_name('get_won_lost_trades_by_symbol'),
+    ('iter_closed_trades', _reference_trades, lambda df: [(date, symbol, pnl) for date, _, symbol, pnl in calculations.iter_closed_trades(df)]),
+    ('update_pnl_sketches', lambda df: _sketch_summary([pnl for _, _, pnl in _reference_trades(df)]), _fast_sketch_summary),
+    ('calculate_rolling_trade_metrics', _reference_trade_metrics, _fast_trade_metrics),
+    ('build_pnl_matrix (by day)', reference.calculate_net_pnl_by_day, _fast_pnl_matrix_by_day),
+    ('build_pnl_matrix (by symbol)', reference.calculate_net_pnl_by_symbol, _fast_pnl_matrix_by_symbol),
+] + [
+    (f'match_lots ({method})', _reference_pnl_by_symbol_of_flat_symbols, _lot_matching_pnl_by_symbol(method))
+    for method in calculations.MATCHING_METHODS
+]
+
+
+def _build_executions(executions: list):
+    """Builds a DataFrame of executions of the symbol 'TEST' from (side, qty, price, commission) tuples, one second apart.
+    """
+    start = pd.Timestamp('2025-01-02 09:30')
+    df = DataFrame(
+        [[start + pd.Timedelta(seconds=second), 'TEST', side, qty, price, commission, 0.0, 0.0, 0.0, 0.0, 0.0] for second, (side, qty, price, commission) in enumerate(executions)],
+        columns=['Date/Time', 'Symbol', 'B/S', 'Qty', 'Price'] + COMMISSION_COLUMNS + ['Ecn Fee'],
+    )
+    df['Date'] = df['Date/Time'].dt.date
+    return df
+
+
+# Lot matching cases with known answers: (name, executions, expected PnL of each exit by method).
+LOT_MATCHING_CASES = [
+    (
+        'scale in and out long',
+        [('B', 100, 10, 0), ('B', 100, 12, 0), ('S', 100, 13, 0), ('S', 100, 11, 0)],
+        {'fifo': [300, -100], 'lifo': [100, 100], 'average': [200, 0]},
+    ),
+    (
+        'scale in and out short',
+        [('T', 100, 10, 0), ('T', 100, 12, 0), ('B', 100, 9, 0), ('B', 100, 11, 0)],
+        {'fifo': [100, 100], 'lifo': [300, -100], 'average': [200, 0]},
+    ),
+    (
+        # Entry fees are charged by the shares closed from each lot, exit fees by the shares of the exit.
+        'proportional fees',
+        [('B', 100, 10, 1), ('B', 100, 12, 3), ('S', 50, 13, 2), ('S', 150, 11, 4)],
+        {'fifo': [147.5, -57.5], 'lifo': [46.5, 43.5], 'average': [97, -7]},
+    ),
+    (
+        # The sell closes the long and opens a short of 50 shares with a third of its fees.
+        'reversal through zero',
+        [('B', 100, 10, 1), ('S', 150, 12, 3), ('B', 50, 11, 0.5)],
+        {'fifo': [197, 48.5], 'lifo': [197, 48.5], 'average': [197, 48.5]},
+    ),
+]
+
+
+def check_lot_matching():
+    """Checks match_lots against the cases with known answers (LOT_MATCHING_CASES).
+
+    :return failures: list of {'check', 'backend', 'seed', 'rows', 'difference'}, as in run_equivalence.
+    """
+    failures = []
+    for name, executions, expected_by_method in LOT_MATCHING_CASES:
+        df = _build_executions(executions)
+        for method, expected in expected_by_method.items():
+            difference = find_difference([float(pnl) for pnl in expected], calculations.match_lots(df, method).pnl.tolist())
+            if difference is not None:
+                failures.append({'check': f'match_lots ({method}): {name}', 'backend': '-', 'seed': None, 'rows': len(df), 'difference': difference})
+    return failures
+
+
+def check_exports():
+    """Checks that every public function and class of the calculations submodules is exported by the package.
+
+    The package only exports the names listed in the '__all__' of each submodule, so a function missing from it would only fail when it is used.
+
+    :return failures: list of {'check', 'backend', 'seed', 'rows', 'difference'}, as in run_equivalence.
+    """
+    failures = []
+    for module_info in pkgutil.iter_modules(calculations.__path__):
+        module = importlib.import_module(f'calculations.{module_info.name}')
+        if not hasattr(module, '__all__'):
+            continue
+
+        public = [
+            name for name, value in vars(module).items()
+            if not name.startswith('_') and (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__ == module.__name__
+        ]
+        missing = [name for name in public if name not in module.__all__]
+        if missing:
+            failures.append({'check': f'exports of calculations.{module_info.name}', 'backend': '-', 'seed': None, 'rows': 0, 'difference': f'not in __all__: {missing}'})
+    return failures
+
+
+def get_available_backends():
+    """Gets the backends that can be used in this environment.
+    """
+    available = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def shrink_executions(df: DataFrame, fails):
+    """Reduces a failing stream of executions, removing whole symbols and then whole days while it still fails.
+
+    :param df: DataFrame with the executions that fail.
+    :param fails: Function that receives a DataFrame and returns True if it still fails.
+    :return df: smallest failing DataFrame found.
+    """
+    for column in ['Symbol', 'Date']:
+        for value in df[column].drop_duplicates().tolist():
+            candidate = df[df[column] != value]
+            if len(candidate) and fails(candidate):
+                df = candidate
+    return df
+
+
+def run_equivalence(cases: int = 20, rows: int = 1000, seed: int = 0, backends: list = None, symbols: int = 20):
+    """Runs every optimized path against the reference implementations over randomized execution streams.
+
+    :param cases: Number of random streams.
+    :param rows: Approximate number of executions of each stream.
+    :param seed: Seed of the first stream. Stream i uses seed + i.
+    :param backends: Backends to check. All the available ones if not given.
+    :param symbols: Number of different symbols of each stream.
+    The exports of the package and the lot matching cases with known answers are checked first (see check_exports and check_lot_matching).
+
+    :return results: dictionary with the 'failures' (list of {'check', 'backend', 'seed', 'rows', 'difference'}) and the 'timings' (key: (check, backend), value: {'reference', 'optimized'} seconds).
+    """
+    backends = backends or get_available_backends()
+    failures = check_exports() + check_lot_matching()
+    timings = {}
+    failed_checks = set()
+
+    for case in range(cases):
+        case_seed = seed + case
+        df = generate_executions(case_seed, rows, symbols)
+
+        for name, reference_function, optimized_function in CHECKS:
+            start = time.perf_counter()
+            expected = reference_function(df)
+            reference_time = time.perf_counter() - start
+
+            for backend in backends:
+                set_backend(backend)
+                start = time.perf_counter()
+                actual = optimized_function(df)
+                optimized_time = time.perf_counter() - start
+
+                timing = timings.setdefault((name, backend), {'reference': 0, 'optimized': 0})
+                timing['reference'] += reference_time
+                timing['optimized'] += optimized_time
+
+                difference = find_difference(expected, actual)
+                if difference is None or (name, backend) in failed_checks:
+                    continue
+
+                # Report the first failure of each check, reduced to the smallest stream that still fails.
+                failed_checks.add((name, backend))
+                shrunk = shrink_executions(df, lambda candidate: find_difference(reference_function(candidate), optimized_function(candidate)) is not None)
+                failures.append({
+                    'check': name,
+                    'backend': backend,
+                    'seed': case_seed,
+                    'rows': len(shrunk),
+                    'difference': find_difference(reference_function(shrunk), optimized_function(shrunk)),
+                })
+
+    set_backend(backends[0])
+    return {'failures': failures, 'timings': timings}
+
+
+def main(argv: list = None):
+    """Command line entry point. Exits with code 1 if any optimized path doesn't match the reference.
+    """
+    parser = argparse.ArgumentParser(description='Check the optimized calculations against the reference iterrows implementations.')
+    parser.add_argument('--cases', type=int, default=20, help='Number of random execution streams.')
+    parser.add_argument('--rows', type=int, default=1000, help='Approximate number of executions of each stream.')
+    parser.add_argument('--symbols', type=int, default=20, help='Number of different symbols of each stream.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the first stream.')
+    parser.add_argument('--backend', action='append', choices=list(BACKENDS), help='Backend to check (can be repeated). All the available ones by default.')
+    args = parser.parse_args(argv)
+
+    results = run_equivalence(args.cases, args.rows, args.seed, args.backend, args.symbols)
+
+    print(f"{'Check':<52}{'Backend':<10}{'Reference (s)':>15}{'Optimized (s)':>15}{'Speedup':>10}")
+    for (name, backend), timing in results['timings'].items():
+        speedup = timing['reference'] / timing['optimized'] if timing['optimized'] > 0 else float('inf')
+        print(f"{name:<52}{backend:<10}{timing['reference']:>15.4f}{timing['optimized']:>15.4f}{speedup:>9.1f}x")
+
+    for failure in results['failures']:
+        print(f"FAILED {failure['check']} [{failure['backend']}] seed={failure['seed']} rows={failure['rows']}: {failure['difference']}")
+
+    if results['failures']:
+        sys.exit(1)
+    print('All the optimized paths match the reference.')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,84 +1,180 @@
-from calculations.aggregate_calculations import *
-from calculations.symbol_metrics import *
-from calculations.per_day_metrics import *
-from calculations.row_calculations import *
-from trading_report.config import *
-
-
-df = load_data('my-accounts-from-2025-01-01-executions.xls')
-df = clean_data(df)
-
-
-# Obtain metrics
-total_net = calculate_net_pnl_total(df)
-total_gross = calculate_gross_pnl_total(df)
-#------------------------------------------------------
-total_day_net = calculate_net_pnl_by_day(df)
-total_day_gross = calculate_gross_pnl_by_day(df)
-total_accumulated_per_day_net = calculate_cumulative_net_pnl_by_day(df)
-total_accumulated_per_day_gross = calculate_cumulative_gross_pnl_by_day(df)
-#------------------------------------------------------
-total_symbol_net = calculate_net_pnl_by_symbol(df)
-total_symbol_gross = calculate_gross_pnl_by_symbol(df)
-#------------------------------------------------------
-total_shares = calculate_total_shares(df)
-shares_per_day = calculate_shares_by_day(df)
-#------------------------------------------------------
-total_commissions = calculate_total_commissions(df)
-total_ecn_fees = calculate_total_ecn_fees(df)
-commissions_per_day = calculate_commissions_by_day(df)
-ecn_fees_per_day = calculate_ecn_fees_by_day(df)
-#------------------------------------------------------
-winning_trades = calculate_winning_trades(df)
-losing_trades = calculate_losing_trades(df)
-winning_losing_trades_per_symbol = get_won_lost_trades_by_symbol(df)
-winning_losing_trades_per_day = get_won_lost_trades_by_day(df)
-trades_per_symbol = get_trades_by_symbol_and_date(df)
-trades_per_symbol_date_time = get_trades_by_symbol_date_and_time(df)
-trades_per_date = get_trades_by_date(df)
-individual_trades = get_individual_trades_per_day(df)
-#------------------------------------------------------
-average_winning_losing_trades = calculate_avg_winning_and_losing_trades(df)
-average_winning_losing_trades_filtered = calculate_filtered_avg_winning_and_losing_trades(df)
-profit_factor = calculate_profit_factor(df)
-profit_factor_filtered = calculate_filtered_profit_factor(df)
-accuracy_percentage = calculate_accuracy_percentage(df)
-
-
-# Print the information
-print('Net PnL: ', total_net)
-print('Gross PnL: ', total_gross)
-#------------------------------------------------------
-print('Average winning and losing trades: ', average_winning_losing_trades)
-print('Average winning and losing trades filtered: ', average_winning_losing_trades_filtered)
-print('Profit factor: ', profit_factor)
-print('Profit factor filtered: ', profit_factor_filtered)
-print('Accuracy percentage: ', accuracy_percentage)
-#------------------------------------------------------
-print('Winning trades: ', winning_trades)
-print('Losing trades: ', losing_trades)
-#------------------------------------------------------
-print('Total commissions: ', total_commissions)
-print('Total ecn fees: ', total_ecn_fees)
-#------------------------------------------------------
-print('Total shares: ', total_shares)
-#------------------------------------------------------
-print('Shares per day: ', shares_per_day)
-print('Commissions per day: ', commissions_per_day)
-print('Ecn fees per day: ', ecn_fees_per_day)
-#------------------------------------------------------
-print('Total net per day: ', total_day_net)
-print('Total gross per day: ', total_day_gross)
-print('Total accumulated net per day: ', total_accumulated_per_day_net)
-print('Total accumulated gross per day: ', total_accumulated_per_day_gross)
-#------------------------------------------------------
-print('Total net per symbol: ', total_symbol_net)
-print('Total gross per symbol: ', total_symbol_gross)
-#------------------------------------------------------
-print('Winning and losing trades per symbol: ', winning_losing_trades_per_symbol)
-print('Winning and losing trades per day: ', winning_losing_trades_per_day)
-print('Trades per symbol and date: ', trades_per_symbol)
-print('Trades per symbol, date and time: ', trades_per_symbol_date_time)
-print('Trades per date: ', trades_per_date)
-print('Individual trades: ', individual_trades)
-#------------------------------------------------------
+import argparse
+import sys
+import calculations
+from trading_report.summary import read_summary, write_summary
+
+DEFAULT_FILE = 'my-accounts-from-2025-01-01-executions.xls'
+
+
+def print_summary(summary: dict):
+    """Prints the headline metrics.
+    """
+    print('Net PnL: ', summary['net_pnl'])
+    print('Gross PnL: ', summary['gross_pnl'])
+    print('Winning trades: ', summary['winning_trades'])
+    print('Losing trades: ', summary['losing_trades'])
+    print('Total commissions: ', summary['total_commissions'])
+    print('Total ecn fees: ', summary['total_ecn_fees'])
+
+
+def run_report(file: str, charts_dir: str = None, summary_only: bool = False, matching: str = None, snapshot_path: str = None):
+    """Loads the executions file, calculates every metric, prints them and saves the summary used by the fast-path.
+
+    :param file: Path of the xls file to import.
+    :param charts_dir: Directory where the charts are rendered. No charts are rendered if not given.
+    :param summary_only: Only calculate and print the headline metrics.
+    :param matching: Lot matching method ('fifo', 'lifo' or 'average') used for the trade metrics. By default, trades are closed when the position is flat.
+    :param snapshot_path: Path where the snapshot of the report is saved. No snapshot is saved if not given.
+    """
+    # pandas is only imported here, when the full report is needed.
+    from trading_report.config import load_data, clean_data
+
+    df = load_data(file)
+    df = clean_data(df)
+
+    # Save the headline metrics for the summary fast-path.
+    summary = calculations.calculate_summary_metrics(df, matching)
+    write_summary(file, summary, matching)
+
+    if summary_only:
+        print_summary(summary)
+        return
+
+
+    # Validate the executions
+    validation = calculations.validate_positions(df)
+
+
+    # Obtain metrics
+    total_day_net = calculations.calculate_net_pnl_by_day(df)
+    total_day_gross = calculations.calculate_gross_pnl_by_day(df)
+    total_accumulated_per_day_net = calculations.calculate_cumulative_net_pnl_by_day(df)
+    total_accumulated_per_day_gross = calculations.calculate_cumulative_gross_pnl_by_day(df)
+    #------------------------------------------------------
+    total_symbol_net = calculations.calculate_net_pnl_by_symbol(df)
+    total_symbol_gross = calculations.calculate_gross_pnl_by_symbol(df)
+    #------------------------------------------------------
+    total_shares = calculations.calculate_total_shares(df)
+    shares_per_day = calculations.calculate_shares_by_day(df)
+    #------------------------------------------------------
+    commissions_per_day = calculations.calculate_commissions_by_day(df)
+    ecn_fees_per_day = calculations.calculate_ecn_fees_by_day(df)
+    #------------------------------------------------------
+    winning_losing_trades_per_symbol = calculations.get_won_lost_trades_by_symbol(df, matching)
+    winning_losing_trades_per_day = calculations.get_won_lost_trades_by_day(df, matching)
+    trades_per_symbol = calculations.get_trades_by_symbol_and_date(df, matching)
+    trades_per_symbol_date_time = calculations.get_trades_by_symbol_date_and_time(df, matching)
+    trades_per_date = calculations.get_trades_by_date(df, matching)
+    individual_trades = calculations.get_individual_trades_per_day(df, matching)
+    #------------------------------------------------------
+    average_winning_losing_trades = calculations.calculate_avg_winning_and_losing_trades(df, matching=matching)
+    average_winning_losing_trades_filtered = calculations.calculate_filtered_avg_winning_and_losing_trades(df, matching=matching)
+    profit_factor = calculations.calculate_profit_factor(df, matching=matching)
+    profit_factor_filtered = calculations.calculate_filtered_profit_factor(df, matching=matching)
+    accuracy_percentage = calculations.calculate_accuracy_percentage(df, matching=matching)
+    #------------------------------------------------------
+    pnl_distribution = calculations.summarize_pnl_sketches(calculations.update_pnl_sketches(df, matching=matching))
+    rolling_daily_metrics = calculations.calculate_rolling_daily_metrics(df, 20, matching)
+    rolling_trade_metrics = calculations.calculate_rolling_trade_metrics(df, 100, matching)
+    #------------------------------------------------------
+    pnl_matrix = calculations.build_pnl_matrix(df)
+    top_contributors_per_day = calculations.get_top_contributors_by_day(pnl_matrix)
+    concentration_per_day = calculations.calculate_concentration_by_day(pnl_matrix)
+    symbol_concentration = calculations.calculate_symbol_concentration(pnl_matrix)
+    symbol_correlation = calculations.calculate_symbol_correlation(pnl_matrix)
+    repeat_ticker_performance = calculations.calculate_repeat_ticker_performance(pnl_matrix)
+
+
+    # Print the information
+    print_summary(summary)
+    #------------------------------------------------------
+    if not validation['is_flat']:
+        print('Share imbalances per day: ', validation['day_imbalances'])
+        print('Share imbalances per day and symbol: ', validation['day_symbol_imbalances'])
+        print('Positions carried overnight: ', validation['overnight_positions'])
+        print('Open positions: ', validation['open_positions'])
+        print('Position flips: ', validation['position_flips'])
+    #------------------------------------------------------
+    print('Average winning and losing trades: ', average_winning_losing_trades)
+    print('Average winning and losing trades filtered: ', average_winning_losing_trades_filtered)
+    print('Profit factor: ', profit_factor)
+    print('Profit factor filtered: ', profit_factor_filtered)
+    print('Accuracy percentage: ', accuracy_percentage)
+    print('Trade PnL distribution: ', pnl_distribution['total'])
+    #------------------------------------------------------
+    print('Total shares: ', total_shares)
+    #------------------------------------------------------
+    print('Shares per day: ', shares_per_day)
+    print('Commissions per day: ', commissions_per_day)
+    print('Ecn fees per day: ', ecn_fees_per_day)
+    #------------------------------------------------------
+    print('Total net per day: ', total_day_net)
+    print('Total gross per day: ', total_day_gross)
+    print('Total accumulated net per day: ', total_accumulated_per_day_net)
+    print('Total accumulated gross per day: ', total_accumulated_per_day_gross)
+    #------------------------------------------------------
+    print('Total net per symbol: ', total_symbol_net)
+    print('Total gross per symbol: ', total_symbol_gross)
+    #------------------------------------------------------
+    print('Winning and losing trades per symbol: ', winning_losing_trades_per_symbol)
+    print('Winning and losing trades per day: ', winning_losing_trades_per_day)
+    print('Trades per symbol and date: ', trades_per_symbol)
+    print('Trades per symbol, date and time: ', trades_per_symbol_date_time)
+    print('Trades per date: ', trades_per_date)
+    print('Individual trades: ', individual_trades)
+    #------------------------------------------------------
+    print('Trade PnL distribution per symbol: ', pnl_distribution['by_symbol'])
+    print('Trade PnL distribution per day: ', pnl_distribution['by_day'])
+    #------------------------------------------------------
+    print('Rolling 20-day metrics: ', rolling_daily_metrics)
+    print('Rolling 100-trade metrics: ', rolling_trade_metrics)
+    #------------------------------------------------------
+    print('Top contributors per day: ', top_contributors_per_day)
+    print('Symbol concentration per day: ', concentration_per_day)
+    print('Symbol concentration: ', symbol_concentration)
+    print('Symbol correlation: ', symbol_correlation)
+    print('Repeat ticker performance: ', repeat_ticker_performance)
+    #------------------------------------------------------
+
+
+    # Render the charts
+    if charts_dir:
+        from trading_report.charts import render_charts
+        chart_paths = render_charts(df, charts_dir, matching=matching)
+        print('Charts: ', chart_paths)
+
+
+    # Save the snapshot
+    if snapshot_path:
+        from trading_report.snapshots import write_snapshot
+        print('Snapshot: ', write_snapshot(df, snapshot_path, matching))
+
+
+def main(argv: list = None):
+    """Command line entry point.
+
+    With --summary, the headline metrics are read from the summary saved by the last full report, without importing pandas. If there is no summary or the file changed, the summary is calculated again.
+    """
+    parser = argparse.ArgumentParser(description='Trading report from a PropReports executions file.')
+    parser.add_argument('file', nargs='?', default=DEFAULT_FILE, help='Path of the xls file exported from PropReports > Executions.')
+    parser.add_argument('--summary', action='store_true', help='Only print the headline metrics, using the saved summary when it is up to date.')
+    parser.add_argument('--charts', metavar='DIR', help='Directory where the charts are rendered.')
+    parser.add_argument('--snapshot', metavar='PATH', help='Save a snapshot of the report, to compare it later with python -m trading_report.snapshots diff.')
+    parser.add_argument('--backend', choices=['pandas', 'polars'], help='DataFrame backend used for the aggregations (default: TRADING_REPORT_BACKEND or pandas).')
+    parser.add_argument('--matching', choices=['fifo', 'lifo', 'average'], help='Realize the PnL of every partial exit matching lots with this method.')
+    args = parser.parse_args(argv)
+
+    if args.summary:
+        summary = read_summary(args.file, args.matching)
+        if summary is not None:
+            print_summary(summary)
+            return
+
+    if args.backend:
+        calculations.set_backend(args.backend)
+
+    run_report(args.file, args.charts, args.summary, args.matching, args.snapshot)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
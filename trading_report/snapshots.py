@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import zlib
+
+SNAPSHOT_MAGIC = b'TRSNAP'
+SNAPSHOT_VERSION = 1
+_HEADER_STRUCT = struct.Struct('<HI')  # Version, length of the index.
+
+
+def _encode_partition(payload):
+    """Encodes a partition as canonical JSON bytes, so the same content always has the same bytes and hash.
+    """
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'), allow_nan=True).encode('utf-8')
+
+
+def _hash_partition(data: bytes):
+    """Calculates the content hash of an encoded partition.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def build_snapshot_partitions(df, matching: str = None):
+    """Calculates the report and splits it in partitions: the summary, one per day and one per symbol.
+
+    - 'summary': headline metrics (see calculate_summary_metrics) and the matching method.
+    - 'day:<date>': gross and net PnL, commissions, ECN fees, shares, net PnL by symbol and the trades closed that day.
+    - 'symbol:<symbol>': gross and net PnL, commissions, ECN fees and won/lost trades.
+
+    :param df: DataFrame with the executions.
+    :param matching: How trades are reconstructed, see build_trade_records.
+    :return partitions: dictionary. Key: partition key, value: JSON serializable content.
+    """
+    import calculations
+    from calculations.backends import get_backend
+
+    backend = get_backend()
+    records = calculations.build_trade_records(df, matching)
+    partitions = {'summary': {**calculations.calculate_summary_metrics(df, matching), 'matching': matching}}
+
+    # Partitions by day.
+    shares_by_day = calculations.calculate_shares_by_day(df)
+    by_day = backend.aggregate(df, ['Date'])
+    by_day_and_symbol = backend.aggregate(df, ['Date', 'Symbol'])['net_pnl']
+
+    days = {}
+    for day, row in by_day.iterrows():
+        days[day] = {
+            'gross_pnl': float(row['gross_pnl']),
+            'net_pnl': float(row['net_pnl']),
+            'commissions': float(row['commissions']),
+            'ecn_fees': float(row['ecn_fees']),
+            'shares': {side: int(shares) for side, shares in shares_by_day[day].items()},
+            'symbols': {},
+            'trades': [],
+        }
+    for (day, symbol), net_pnl in by_day_and_symbol.items():
+        days[day]['symbols'][str(symbol)] = float(net_pnl)
+    for trade in records:
+        days[trade.date]['trades'].append([trade.date_time.isoformat(), str(trade.symbol), trade.pnl])
+
+    for day in sorted(days):
+        partitions[f'day:{day.isoformat()}'] = days[day]
+
+    # Partitions by symbol.
+    by_symbol = backend.aggregate(df, ['Symbol'])
+    won = dict.fromkeys(by_symbol.index, 0)
+    lost = dict.fromkeys(by_symbol.index, 0)
+    for symbol, pnl in zip(records.symbol_array(), records.pnl):
+        if pnl > 0:
+            won[symbol] += 1
+        else:
+            lost[symbol] += 1
+
+    for symbol, row in by_symbol.iterrows():
+        partitions[f'symbol:{symbol}'] = {
+            'gross_pnl': float(row['gross_pnl']),
+            'net_pnl': float(row['net_pnl']),
+            'commissions': float(row['commissions']),
+            'ecn_fees': float(row['ecn_fees']),
+            'won': won[symbol],
+            'lost': lost[symbol],
+        }
+
+    return partitions
+
+
+def write_snapshot(df, path: str, matching: str = None):
+    """Saves the report of the executions as a compact binary snapshot.
+
+    The file has a small header (magic, version and the length of the index), a JSON index with the offset, length and content hash of each partition, and the partitions compressed with zlib.
+    The index is enough to know which partitions changed between two snapshots, without decompressing them.
+
+    :param df: DataFrame with the executions.
+    :param path: Path of the snapshot file.
+    :param matching: How trades are reconstructed, see build_trade_records.
+    :return path: path of the snapshot file.
+    """
+    index = []
+    blobs = []
+    offset = 0
+
+    for key, payload in build_snapshot_partitions(df, matching).items():
+        data = _encode_partition(payload)
+        blob = zlib.compress(data, 9)
+        index.append({'key': key, 'offset': offset, 'length': len(blob), 'hash': _hash_partition(data)})
+        blobs.append(blob)
+        offset += len(blob)
+
+    index_data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC)
+        snapshot_file.write(_HEADER_STRUCT.pack(SNAPSHOT_VERSION, len(index_data)))
+        snapshot_file.write(index_data)
+        for blob in blobs:
+            snapshot_file.write(blob)
+
+    return path
+
+
+def read_snapshot_index(path: str):
+    """Reads the index of a snapshot, without reading the partitions.
+
+    :param path: Path of the snapshot file.
+    :return index, data_start: dictionary (key: partition key, value: {'offset', 'length', 'hash'}) and position in the file where the partitions start.
+    """
+    with open(path, 'rb') as snapshot_file:
+        if snapshot_file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"'{path}' is not a report snapshot.")
+
+        version, index_length = _HEADER_STRUCT.unpack(snapshot_file.read(_HEADER_STRUCT.size))
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in '{path}' (expected {SNAPSHOT_VERSION}).")
+
+        index = json.loads(snapshot_file.read(index_length).decode('utf-8'))
+
+    data_start = len(SNAPSHOT_MAGIC) + _HEADER_STRUCT.size + index_length
+    return {entry['key']: entry for entry in index}, data_start
+
+
+def read_snapshot_partitions(path: str, keys: list = None):
+    """Reads and decompresses partitions of a snapshot.
+
+    :param path: Path of the snapshot file.
+    :param keys: Keys of the partitions to read. All of them if not given.
+    :return partitions: dictionary. Key: partition key, value: content.
+    """
+    index, data_start = read_snapshot_index(path)
+    keys = index.keys() if keys is None else keys
+    partitions = {}
+
+    with open(path, 'rb') as snapshot_file:
+        for key in keys:
+            entry = index[key]
+            snapshot_file.seek(data_start + entry['offset'])
+            partitions[key] = json.loads(zlib.decompress(snapshot_file.read(entry['length'])).decode('utf-8'))
+
+    return partitions
+
+
+def _diff_values(old, new):
+    """Compares two partition contents, returning only what changed.
+
+    Dictionaries are compared key by key, lists (trades) as multisets of added and removed items, and other values as (old, new) tuples.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = {}
+        for key in list(old) + [key for key in new if key not in old]:
+            if old.get(key) != new.get(key):
+                changes[key] = _diff_values(old.get(key), new.get(key))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list):
+        old_items = [tuple(item) if isinstance(item, list) else item for item in old]
+        new_items = [tuple(item) if isinstance(item, list) else item for item in new]
+        removed = list(old_items)
+        added = []
+        for item in new_items:
+            if item in removed:
+                removed.remove(item)
+            else:
+                added.append(item)
+        return {'added': added, 'removed': removed}
+
+    return (old, new)
+
+
+def diff_snapshots(old_path: str, new_path: str):
+    """Compares two snapshots partition by partition.
+
+    The content hashes of the indexes are compared first, and only the partitions whose hash changed are read and compared.
+
+    :param old_path: Path of the previous snapshot.
+    :param new_path: Path of the new snapshot.
+    :return diff: dictionary with the 'added' and 'removed' partition keys, and the 'changed' partitions (key: partition key, value: changes).
+    """
+    old_index, _ = read_snapshot_index(old_path)
+    new_index, _ = read_snapshot_index(new_path)
+
+    changed_keys = [key for key in new_index if key in old_index and new_index[key]['hash'] != old_index[key]['hash']]
+    old_partitions = read_snapshot_partitions(old_path, changed_keys)
+    new_partitions = read_snapshot_partitions(new_path, changed_keys)
+
+    return {
+        'added': [key for key in new_index if key not in old_index],
+        'removed': [key for key in old_index if key not in new_index],
+        'changed': {key: _diff_values(old_partitions[key], new_partitions[key]) for key in changed_keys},
+    }
+
+
+def main(argv: list = None):
+    """Command line entry point: 'write' a snapshot of an executions file or 'diff' two snapshots.
+    """
+    parser = argparse.ArgumentParser(description='Report snapshots.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    write_parser = subparsers.add_parser('write', help='Save the report of an executions file as a snapshot.')
+    write_parser.add_argument('file', help='Path of the xls file exported from PropReports > Executions.')
+    write_parser.add_argument('snapshot', help='Path of the snapshot file.')
+    write_parser.add_argument('--matching', choices=['fifo', 'lifo', 'average'], help='Realize the PnL of every partial exit matching lots with this method.')
+
+    diff_parser = subparsers.add_parser('diff', help='Show what changed between two snapshots.')
+    diff_parser.add_argument('old', help='Path of the previous snapshot.')
+    diff_parser.add_argument('new', help='Path of the new snapshot.')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'write':
+        from trading_report.config import load_data, clean_data
+        df = clean_data(load_data(args.file))
+        print('Snapshot: ', write_snapshot(df, args.snapshot, args.matching))
+        return
+
+    diff = diff_snapshots(args.old, args.new)
+    print('Added partitions: ', diff['added'])
+    print('Removed partitions: ', diff['removed'])
+    for key, changes in diff['changed'].items():
+        print(f'Changed {key}: ', changes)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
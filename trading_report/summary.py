@@ -0,0 +1,60 @@
+import json
+import os
+
+SUMMARY_VERSION = 1
+
+
+def get_summary_path(file: str):
+    """Gets the path of the summary file saved next to an executions file.
+    """
+    return f'{file}.summary.json'
+
+
+def _get_source_signature(file: str):
+    """Gets the size and modification time of the executions file, used to detect if the summary is outdated.
+    """
+    stat = os.stat(file)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_summary(file: str, metrics: dict, matching: str = None):
+    """Saves the headline metrics of an executions file in a small JSON file next to it.
+
+    :param file: Path of the executions file the metrics were calculated from.
+    :param metrics: Metrics to save, as returned by calculate_summary_metrics.
+    :param matching: Lot matching method used to reconstruct the trades of the metrics (None if trades are closed when the position is flat).
+    :return path: path of the summary file.
+    """
+    path = get_summary_path(file)
+    summary = {'version': SUMMARY_VERSION, 'source': _get_source_signature(file), 'matching': matching, 'metrics': metrics}
+
+    with open(path, 'w', encoding='utf-8') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+    return path
+
+
+def read_summary(file: str, matching: str = None):
+    """Reads the headline metrics of an executions file from its summary file, without importing pandas.
+
+    :param file: Path of the executions file.
+    :param matching: Lot matching method the metrics must have been calculated with.
+    :return metrics: dictionary with the metrics, or None if there is no summary, it is outdated (the executions file changed after it was written) or it was calculated with another matching method.
+    """
+    path = get_summary_path(file)
+    if not os.path.exists(path) or not os.path.exists(file):
+        return None
+
+    with open(path, encoding='utf-8') as summary_file:
+        try:
+            summary = json.load(summary_file)
+        except json.JSONDecodeError:
+            return None
+
+    if summary.get('version') != SUMMARY_VERSION or summary.get('source') != _get_source_signature(file):
+        return None
+
+    if summary.get('matching') != matching:
+        return None
+
+    return summary['metrics']